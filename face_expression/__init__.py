@@ -7,11 +7,13 @@ Face Expression Analyzer Module
 __version__ = "1.0.0"
 
 from .pipeline import VideoPipeline, ImagePipeline
+from .pipeline import ImagePipeline as StaticFaceAnalyzer
 from .models import AUFeatures, EmotionResult, AnalysisFrameResult
 
 __all__ = [
     'VideoPipeline',
     'ImagePipeline',
+    'StaticFaceAnalyzer',
     'AUFeatures',
     'EmotionResult',
     'AnalysisFrameResult'
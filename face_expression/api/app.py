@@ -1,34 +1,76 @@
 from fastapi import FastAPI, File, UploadFile, HTTPException
-from fastapi.responses import JSONResponse
-import tempfile
+from fastapi.responses import JSONResponse, ORJSONResponse
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
 import os
+import threading
+import cv2
+import numpy as np
 
 # 使用标准导入（假设项目已正确安装或在 PYTHONPATH 中）
 try:
     from face_expression import StaticFaceAnalyzer
+    from face_expression.pipeline import get_shared_face_mesh_pool
 except ImportError as e:
     print(f"❌ 导入失败: {e}")
     print("请确保已正确安装 face_expression 模块")
     raise
 
+# orjson 为可选依赖：安装后响应体由 orjson 序列化（C 实现，比标准库 json 快数倍），
+# 未安装时回退到默认的 JSONResponse
+try:
+    import orjson  # noqa: F401
+    DefaultResponse = ORJSONResponse
+except ImportError:
+    DefaultResponse = JSONResponse
+
 app = FastAPI(
     title="Face Expression Analysis API",
-    description="面部表情分析API，支持图片上传分析"
+    description="面部表情分析API，支持图片上传分析",
+    default_response_class=DefaultResponse
 )
 
-# 初始化分析器（延迟初始化，只有在首次请求时才加载 MediaPipe）
-analyzer = None
+# 解码与分析（含 MediaPipe 推理）在有界线程池中执行，不阻塞事件循环；
+# MediaPipe 推理期间释放 GIL，多个请求可以并行处理
+ANALYSIS_WORKERS = min(os.cpu_count() or 1, 4)
+analysis_executor = ThreadPoolExecutor(max_workers=ANALYSIS_WORKERS, thread_name_prefix="face_analyze")
+
+# 共享 FaceMesh 池与工作线程数一致：每个线程都能取到图对象，既不排队也不多建
+# （图对象在首次取用时才创建，此处不会加载模型）
+get_shared_face_mesh_pool(max_size=ANALYSIS_WORKERS)
+
+@app.on_event("startup")
+async def warm_up_face_mesh():
+    """启动时在分析线程池中预热共享 FaceMesh 池，首个请求无需等待模型加载"""
+    loop = asyncio.get_running_loop()
+    try:
+        await loop.run_in_executor(analysis_executor, get_shared_face_mesh_pool().warm_up)
+    except Exception as e:
+        # 预热失败不影响服务启动，首个请求时会再按需创建
+        print(f"⚠️ FaceMesh 预热失败: {e}")
+
+# 分析器内部复用工作缓冲区，非线程安全：每个工作线程持有独立实例（延迟初始化，
+# FaceMesh 图对象由进程内共享池统一管理）
+_thread_local = threading.local()
 
 def get_analyzer():
-    """获取分析器实例（延迟初始化）"""
-    global analyzer
+    """获取当前线程的分析器实例（延迟初始化）"""
+    analyzer = getattr(_thread_local, "analyzer", None)
     if analyzer is None:
         try:
             analyzer = StaticFaceAnalyzer()
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"分析器初始化失败: {str(e)}")
+        _thread_local.analyzer = analyzer
     return analyzer
 
+def _analyze_bytes(contents):
+    """在工作线程中解码图片并分析"""
+    image_bgr = cv2.imdecode(np.frombuffer(contents, np.uint8), cv2.IMREAD_COLOR)
+    if image_bgr is None:
+        raise HTTPException(status_code=400, detail="无法解码图片，请检查文件内容")
+    return get_analyzer().analyze_bgr(image_bgr)
+
 @app.get("/")
 async def root():
     """根路径，返回API信息"""
@@ -62,24 +104,16 @@ async def analyze_image(file: UploadFile = File(...)):
         raise HTTPException(status_code=400, detail="上传的文件必须是图片格式")
 
     try:
-        # 创建临时文件保存上传的图片
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".jpg") as temp_file:
-            contents = await file.read()
-            temp_file.write(contents)
-            temp_path = temp_file.name
-
-        # 获取分析器并分析图片
-        analyzer = get_analyzer()
-        features = analyzer.analyze_image(temp_path)
-
-        # 删除临时文件
-        os.unlink(temp_path)
+        # 直接在内存中解码上传的图片，无需写入临时文件再读回
+        contents = await file.read()
+        loop = asyncio.get_running_loop()
+        features = await loop.run_in_executor(analysis_executor, _analyze_bytes, contents)
 
         if features is None:
             raise HTTPException(status_code=400, detail="无法分析图片，请确保图片包含清晰的正脸")
 
         # 返回分析结果
-        return JSONResponse(content={
+        return DefaultResponse(content={
             "status": "success",
             "result": features
         })
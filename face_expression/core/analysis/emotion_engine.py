@@ -1,84 +1,151 @@
+import numpy as np
+from operator import attrgetter
 from typing import Optional, Dict
-from ...models.features import AUFeatures, TemporalStats, MicroExpressionResult
+from ...models.features import AUFeatures, TemporalStats, MicroExpressionResult, AU_NUMERIC_INDEX, MOUTH_BASELINE_FIELDS
 from ...models.results import EmotionResult
 
+# === 规则库常量 ===
+# 情绪输出顺序（与原 dict 键顺序一致，argmax 的并列取值规则因此保持不变）
+_EMOTION_ORDER = (
+    "happy", "sadness", "anger", "fear", "surprise",
+    "disgust", "contempt", "anxiety", "fatigue",
+    "polite_smile", "distress",
+    "forced_smile",
+    "startled_anxiety",
+    "cognitive_load",
+    "moral_disgust",
+)
+_E = {name: i for i, name in enumerate(_EMOTION_ORDER)}
+
+# 从 AUFeatures 读取的字段顺序
+_AU_ORDER = (
+    'au1_inner_brow_raise', 'au2_outer_brow_raise', 'au4_frown', 'au6_cheek_raise',
+    'au7_eye_squeeze', 'au9_nose_wrinkle', 'au10_upper_lip_raise', 'au12_smile',
+    'au15_mouth_down', 'au20_lip_stretcher', 'au23_lip_compression', 'au26_jaw_drop',
+    'head_yaw', 'avg_ear', 'symmetry_score',
+)
+_get_au_values = attrgetter(*_AU_ORDER)
+_AU_COLS = np.array([AU_NUMERIC_INDEX[name] for name in _AU_ORDER], dtype=np.int32)  # 在完整 AU 向量中的下标
+AU1, AU2, AU4, AU6, AU7, AU9, AU10, AU12, AU15, AU20, AU23, AU26, YAW, EAR, SYM = range(len(_AU_ORDER))
+# 依赖嘴部静息基线的 AU 在 _AU_ORDER 中的下标（无基线时置 0）
+_MOUTH_BASELINE_COLS = np.array([i for i, name in enumerate(_AU_ORDER) if name in MOUTH_BASELINE_FIELDS], dtype=np.int32)
+
+# 门控特征：在 AU 向量后追加 max(au1, au2)（“au1 或 au2”）以及取负的 yaw / ear / symmetry（“小于”条件）
+_G_BROW, _G_NEG_YAW, _G_NEG_EAR, _G_NEG_SYM = range(len(_AU_ORDER), len(_AU_ORDER) + 4)
+_N_GATE = len(_AU_ORDER) + 4
+
+
+def _rule_tables():
+    """构建线性权重矩阵 W、门控阈值矩阵 T 与上限向量 CAP"""
+    n_emo = len(_EMOTION_ORDER)
+    W = np.zeros((n_emo, len(_AU_ORDER) + 1))  # 最后一列为常数项
+    T = np.full((n_emo, _N_GATE), -np.inf)     # 情绪被激活需满足 gate > T 全部成立
+    cap = np.full(n_emo, np.inf)
+    const = len(_AU_ORDER)
+
+    def rule(name, weights, gates, capped=True):
+        row = _E[name]
+        for col, w in weights.items():
+            W[row, col] = w
+        for col, thr in gates.items():
+            T[row, col] = thr
+        if capped:
+            cap[row] = 1.0
+
+    rule("happy", {AU12: 0.5, AU6: 0.5}, {AU12: 0.1, AU6: 0.1})
+    rule("polite_smile", {AU12: 0.7}, {AU12: 0.1}, capped=False)  # 仅在 happy 未触发时生效
+    rule("surprise", {AU1: 1 / 3, AU2: 1 / 3, AU26: 1 / 3}, {_G_BROW: 0.1, AU26: 0.3})
+    rule("disgust", {AU9: 0.5, AU10: 0.5}, {AU9: 0.2, AU10: 0.1})
+    rule("anger", {AU4: 0.5, AU7: 0.5}, {AU4: 0.3, AU7: 0.3}, capped=False)
+    rule("sadness", {AU4: 0.5, AU15: 0.5}, {AU4: 0.2, AU15: 0.05}, capped=False)
+    rule("distress", {AU4: 0.4, AU15: 0.4}, {AU4: 0.2, AU15: 0.05}, capped=False)
+    rule("fear", {AU1: 1 / 3, AU2: 1 / 3, AU26: 1 / 3}, {_G_BROW: 0.15, AU26: 0.5, YAW: 0.1})
+    rule("fatigue", {const: 1.0, EAR: -1.0}, {_G_NEG_EAR: -0.15}, capped=False)
+    rule("forced_smile", {AU12: 1 / 3, AU20: 1 / 3, AU23: 1 / 3}, {AU12: 0.1, AU20: 0.1, AU23: 0.2})
+    rule("cognitive_load", {AU4: 0.5, AU7: 0.5}, {AU4: 0.2, AU7: 0.3, _G_NEG_YAW: 0.1})
+    rule("moral_disgust", {AU9: 1 / 3, AU10: 1 / 3, AU4: 1 / 3}, {AU9: 0.3, AU10: 0.2, AU4: 0.3})
+    return W, T, cap
+
+
+_W, _T, _CAP = _rule_tables()
+# 不依赖嘴部基线 AU 的线性规则（权重与门控都不涉及这些 AU）；无基线时仅这些规则参与推理
+_BASELINE_FREE_RULES = ~(
+    _W[:, _MOUTH_BASELINE_COLS].any(axis=1) | np.isfinite(_T[:, _MOUTH_BASELINE_COLS]).any(axis=1)
+)
+_BASIC_EMOTIONS = ("happy", "sadness", "anger", "fear", "surprise", "disgust")
+
+
 class EmotionEngine:
+    def __init__(self):
+        # 逐帧复用的工作缓冲区（实例非线程安全，多线程场景请为每个线程创建独立实例）
+        self._emotion_keys = _EMOTION_ORDER
+        self._emotion_buf = np.zeros(len(_EMOTION_ORDER))
+        self._input_buf = np.ones(len(_AU_ORDER) + 1)  # 末位常数项恒为 1
+        self._gate_buf = np.zeros(_N_GATE)
+        self._gate_mask = np.zeros(_T.shape, dtype=bool)
+        self._active = np.zeros(len(_EMOTION_ORDER), dtype=bool)
+
     def infer(
         self,
         au_features: AUFeatures,
         temporal_stats: Optional[TemporalStats] = None,
-        micro_expressions: Optional[MicroExpressionResult] = None
+        micro_expressions: Optional[MicroExpressionResult] = None,
+        mouth_baseline: bool = True
+    ) -> EmotionResult:
+        """
+        参数:
+            mouth_baseline: 嘴部 AU 是否相对已标定的静息基线计算；单张静态图片传 False，
+                此时 MOUTH_BASELINE_FIELDS 视为不可用，依赖它们的规则（happy、surprise、
+                sadness、disgust、contempt 等）不参与推理
+        """
+        au = self._input_buf[:-1]
+        au[:] = _get_au_values(au_features)
+        if not mouth_baseline:
+            au[_MOUTH_BASELINE_COLS] = 0.0
+        return self._infer(temporal_stats, micro_expressions, au_features, mouth_baseline)
+
+    def infer_from_array(
+        self,
+        au_vec: np.ndarray,
+        temporal_stats: Optional[TemporalStats] = None,
+        micro_expressions: Optional[MicroExpressionResult] = None,
+        au_features: Optional[AUFeatures] = None
     ) -> EmotionResult:
-        emotions = {
-            "happy": 0.0, "sadness": 0.0, "anger": 0.0, "fear": 0.0, "surprise": 0.0,
-            "disgust": 0.0, "contempt": 0.0, "anxiety": 0.0, "fatigue": 0.0,
-            "polite_smile": 0.0, "distress": 0.0,
-            "forced_smile": 0.0,
-            "startled_anxiety": 0.0,
-            "cognitive_load": 0.0,
-            "moral_disgust": 0.0
-        }
-
-        au1 = au_features.au1_inner_brow_raise
-        au2 = au_features.au2_outer_brow_raise
-        au4 = au_features.au4_frown
-        au6 = au_features.au6_cheek_raise
-        au7 = au_features.au7_eye_squeeze
-        au9 = au_features.au9_nose_wrinkle
-        au10 = au_features.au10_upper_lip_raise
-        au12 = au_features.au12_smile
-        au14 = au_features.au14_dimpler
-        au15 = au_features.au15_mouth_down
-        au20 = au_features.au20_lip_stretcher
-        au23 = au_features.au23_lip_compression
-        au25 = au_features.au25_mouth_open
-        au26 = au_features.au26_jaw_drop
-        symmetry = au_features.symmetry_score
-        head_yaw = au_features.head_yaw
-        avg_ear = au_features.avg_ear
-
-        if au12 > 0.1 and au6 > 0.1:
-            emotions["happy"] = min((au12 + au6) / 2, 1.0)
-        elif au12 > 0.1:
-            emotions["polite_smile"] = au12 * 0.7
-
-        if (au1 > 0.1 or au2 > 0.1) and au26 > 0.3:
-            emotions["surprise"] = min((au1 + au2 + au26) / 3, 1.0)
-
-        if au9 > 0.2 and au10 > 0.1:
-            emotions["disgust"] = min((au9 + au10) / 2, 1.0)
-
-        if au4 > 0.3 and au7 > 0.3:
-            emotions["anger"] = (au4 + au7) / 2
-
-        if au4 > 0.2 and au15 > 0.05:
-            sadness = (au4 + au15) / 2
-            emotions["sadness"] = sadness
-            emotions["distress"] = sadness * 0.8
-
-        if (au1 > 0.15 or au2 > 0.15) and au26 > 0.5 and head_yaw > 0.1:
-            emotions["fear"] = min((au1 + au2 + au26) / 3, 1.0)
-
-        if avg_ear < 0.15:
-            emotions["fatigue"] = 1.0 - avg_ear
-
-        if au12 > 0.1 and au20 > 0.1 and au23 > 0.2:
-            emotions["forced_smile"] = min((au12 + au20 + au23) / 3, 1.0)
+        """基于按 AU_NUMERIC_FIELDS 排列的 AU 向量推理情绪（au_features 仅用于生成摘要）"""
+        np.take(au_vec, _AU_COLS, out=self._input_buf[:-1])
+        return self._infer(temporal_stats, micro_expressions, au_features)
+
+    def _infer(self, temporal_stats, micro_expressions, au_features, mouth_baseline=True):
+        au = self._input_buf[:-1]
+        # 标量规则使用 Python float，避免逐个读取 NumPy 标量
+        au_values = au.tolist()
+        au12, head_yaw, symmetry = au_values[AU12], au_values[YAW], au_values[SYM]
+
+        # 线性规则：门控 × 权重组合，再按上限截断
+        gate_features = self._gate_buf
+        gate_features[:len(_AU_ORDER)] = au
+        gate_features[len(_AU_ORDER):] = (max(au_values[AU1], au_values[AU2]), -head_yaw, -au_values[EAR], -symmetry)
+        np.greater(gate_features, _T, out=self._gate_mask)
+        active = np.logical_and.reduce(self._gate_mask, axis=1, out=self._active)
+        if not mouth_baseline:
+            active &= _BASELINE_FREE_RULES
+        vec = np.matmul(_W, self._input_buf, out=self._emotion_buf)
+        vec *= active
+        np.minimum(vec, _CAP, out=vec)
+
+        # 非线性规则的后处理
+        if active[_E["happy"]]:
+            vec[_E["polite_smile"]] = 0.0
 
         if temporal_stats and \
            temporal_stats.data.get('au1_inner_brow_raise_trend', 0) > 0.01 and \
            temporal_stats.data.get('au4_frown_trend', 0) > 0.01:
-            emotions["startled_anxiety"] = 0.7
-
-        if au4 > 0.2 and au7 > 0.3 and head_yaw < -0.1:
-            emotions["cognitive_load"] = min((au4 + au7) / 2, 1.0)
-
-        if au9 > 0.3 and au10 > 0.2 and au4 > 0.3:
-            emotions["moral_disgust"] = min((au9 + au10 + au4) / 3, 1.0)
+            vec[_E["startled_anxiety"]] = 0.7
 
         if au12 > 0.1 and symmetry < 0.7:
-            emotions["contempt"] = min(au12 * (1 - symmetry), 1.0)
+            vec[_E["contempt"]] = min(au12 * (1 - symmetry), 1.0)
 
+        au4, au23 = au_values[AU4], au_values[AU23]
         anxiety_score = 0.0
         if au4 > 0.1:
             anxiety_score += au4 * 0.5
@@ -86,13 +153,15 @@ class EmotionEngine:
             anxiety_score += (au23 - 0.2) * 1.5
         if head_yaw < -0.05:
             anxiety_score += 0.2
-        emotions["anxiety"] = min(anxiety_score, 1.0)
+        vec[_E["anxiety"]] = min(anxiety_score, 1.0)
 
-        total = sum(emotions.values())
+        total = vec.sum()
         if total > 0:
-            for k in emotions:
-                emotions[k] = round(emotions[k] / total, 3)
+            vec /= total
+            vec.round(3, out=vec)
+            emotions = dict(zip(self._emotion_keys, vec.tolist()))
         else:
+            emotions = dict(zip(self._emotion_keys, vec.tolist()))
             emotions["neutral"] = 1.0
 
         dominant = max(emotions, key=emotions.get)
@@ -100,9 +169,7 @@ class EmotionEngine:
 
         summary = self._generate_psychological_summary(emotions, au_features, micro_expressions)
 
-        composite_emotions = [k for k, v in emotions.items() if v > 0.3 and k not in [
-            "happy", "sadness", "anger", "fear", "surprise", "disgust"
-        ]]
+        composite_emotions = [k for k, v in emotions.items() if v > 0.3 and k not in _BASIC_EMOTIONS]
 
         return EmotionResult(
             emotion_vector=emotions,
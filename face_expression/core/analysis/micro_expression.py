@@ -1,48 +1,113 @@
-from collections import deque
 import numpy as np
-from ...models.features import AUFeatures, MicroExpressionResult
+from ..jit import njit, NUMBA_AVAILABLE
+from ...models.features import AUFeatures, MicroExpressionResult, AU_NUMERIC_INDEX, get_au_vector
+
+@njit(cache=True)
+def _detect_core(series, min_activation):
+    """
+    逐个 AU 计算基线、动态阈值与超阈持续帧数
+
+    series: (AU 数, n) 按时间顺序的历史窗口，最后一列为当前帧
+    返回 (是否触发, 持续帧数, 当前值)
+    """
+    n_au, n = series.shape
+    hits = np.zeros(n_au, dtype=np.bool_)
+    durations = np.zeros(n_au, dtype=np.int64)
+    currents = np.empty(n_au)
+    for a in range(n_au):
+        reference = series[a, :n - 5]
+        m = reference.shape[0]
+        # 顺序累加求均值与方差：与 NumPy 的 pairwise 求和可能存在末位差异，可忽略
+        baseline = 0.0
+        for k in range(m):
+            baseline += reference[k]
+        baseline /= m
+        variance = 0.0
+        for k in range(m):
+            d = reference[k] - baseline
+            variance += d * d
+        std_dev = np.sqrt(variance / m)
+        if std_dev == 0:
+            std_dev = 0.01
+        current_val = series[a, n - 1]
+        dynamic_threshold = baseline + 1.5 * std_dev
+
+        duration = 0
+        for k in range(max(0, n - 8), n):
+            if series[a, k] > dynamic_threshold:
+                duration += 1
+
+        currents[a] = current_val
+        durations[a] = duration
+        hits[a] = current_val > dynamic_threshold and current_val > min_activation and 2 <= duration <= 8
+    return hits, durations, currents
+
+
+def _detect_numpy(series, min_activation):
+    """_detect_core 的 NumPy 向量化实现（numba 不可用时使用），三个 AU 一起计算"""
+    reference = series[:, :-5]
+    baseline = reference.mean(axis=1)
+    std_dev = reference.std(axis=1)
+    std_dev[std_dev == 0] = 0.01
+    current_val = series[:, -1]
+
+    dynamic_threshold = baseline + 1.5 * std_dev
+    durations = np.count_nonzero(series[:, -8:] > dynamic_threshold[:, np.newaxis], axis=1)
+    hits = (current_val > dynamic_threshold) & (current_val > min_activation) & \
+           (durations >= 2) & (durations <= 8)
+    return hits, durations, current_val
+
+
+_detect = _detect_core if NUMBA_AVAILABLE else _detect_numpy
+
 
 class MicroExpressionDetector:
+    AU_NAMES = ('au4_frown', 'au7_eye_squeeze', 'au15_mouth_down')
+
     def __init__(self, fps=30):
         self.window_size = int(0.5 * fps)
-        self.au_history = {au: deque(maxlen=15) for au in [
-            'au4_frown', 'au7_eye_squeeze', 'au15_mouth_down'
-        ]}
+        self.history_len = 15
+        # (AU 数, 2 × 历史长度) 环形缓冲区：每个值同时写入 i 与 i + history_len 两处，
+        # 任意时刻按时间顺序的窗口都是一个连续切片，无需 deque→list 复制或 np.roll
+        self._buf = np.zeros((len(self.AU_NAMES), 2 * self.history_len))
+        self._head = 0   # 下一次写入位置
+        self._count = 0  # 有效帧数
+        self._au_cols = np.array([AU_NUMERIC_INDEX[au] for au in self.AU_NAMES], dtype=np.int32)
         self.calibration_frames = 0
         self.max_calibration = 10
 
     def detect(self, current_au_values: AUFeatures) -> MicroExpressionResult:
-        au_dict = {k: v for k, v in current_au_values.__dict__.items() if k in self.au_history}
-        
-        for au_name in self.au_history:
-            if au_name in au_dict:
-                self.au_history[au_name].append(au_dict[au_name])
+        return self.detect_from_array(get_au_vector(current_au_values))
+
+    def detect_from_array(self, au_vec) -> MicroExpressionResult:
+        """基于按 AU_NUMERIC_FIELDS 排列的 AU 向量检测微表情"""
+        current = au_vec[self._au_cols]
+        self._buf[:, self._head] = current
+        self._buf[:, self._head + self.history_len] = current
+        self._head = (self._head + 1) % self.history_len
+        self._count = min(self._count + 1, self.history_len)
 
         if self.calibration_frames < self.max_calibration:
             self.calibration_frames += 1
             return MicroExpressionResult(data={})
 
+        n = self._count
+        if n < 10:
+            return MicroExpressionResult(data={})
+
+        # (AU 数, n)，按时间顺序，最后一列为当前帧
+        end = self._head + self.history_len
+        series = self._buf[:, end - n:end]
+
+        hits, duration, current_val = _detect(series, 0.1)
+
         micro_exps = {}
-        for au_name in self.au_history:
-            if len(self.au_history[au_name]) < 10:
-                continue
-
-            series = list(self.au_history[au_name])
-            baseline = np.mean(series[:-5])
-            std_dev = np.std(series[:-5]) or 0.01
-            current_val = series[-1]
-
-            dynamic_threshold = baseline + 1.5 * std_dev
-            min_activation = 0.1
-
-            if current_val > dynamic_threshold and current_val > min_activation:
-                recent_series = series[-8:]
-                duration = sum(1 for v in recent_series if v > dynamic_threshold)
-                if 2 <= duration <= 8:
-                    micro_exps[au_name] = {
-                        'intensity': round(float(current_val), 3),
-                        'duration_frames': duration,
-                        'onset_frame': len(series) - duration
-                    }
-
-        return MicroExpressionResult(data=micro_exps)
\ No newline at end of file
+        for i in np.flatnonzero(hits).tolist():
+            d = int(duration[i])
+            micro_exps[self.AU_NAMES[i]] = {
+                'intensity': round(float(current_val[i]), 3),
+                'duration_frames': d,
+                'onset_frame': n - d
+            }
+
+        return MicroExpressionResult(data=micro_exps)
@@ -1,42 +1,77 @@
-from ...models.features import AUFeatures, TemporalStats
-from ...models.results import TensionResult
+import numpy as np
+from ..jit import njit
+from ...models.features import AUFeatures, TemporalStats, AU_NUMERIC_INDEX, get_au_vector
+from ...models.results import TensionResult, TensionSources
+
+# 紧张度用到的 AU 向量下标
+_TENSION_COLS = np.array([
+    AU_NUMERIC_INDEX['au4_frown'],
+    AU_NUMERIC_INDEX['au23_lip_compression'],
+    AU_NUMERIC_INDEX['eye_closed_sec'],
+], dtype=np.int32)
+
+
+@njit(cache=True)
+def _tension_core(au4, au23, eye_closed_sec, smile_vol, asymmetry,
+                  has_emotion, anxiety, anger, fear, moral_disgust):
+    """紧张度的纯数值部分，返回 (tension, eye_closed, emotional_boost)"""
+    eye_closed = min(eye_closed_sec / 2.0, 1.0)
+    base_tension = (
+        0.3 * au4 +
+        0.25 * au23 +
+        0.2 * eye_closed +
+        0.15 * smile_vol +
+        0.1 * asymmetry
+    )
+
+    emotional_boost = 0.0
+    if has_emotion:
+        emotional_boost = max(anxiety, anger, fear, moral_disgust)
+        base_tension = min(base_tension + emotional_boost * 0.3, 1.0)
+
+    return min(base_tension, 1.0), eye_closed, emotional_boost
+
 
 class TensionEngine:
+    # 参与情绪加成（取最大值）的情绪，顺序与 _tension_core 的参数一致
+    EMO_KEYS = ('anxiety', 'anger', 'fear', 'moral_disgust')
+    _EMO_DEFAULTS = (0.0,) * len(EMO_KEYS)
+
     def compute(self, au_features: AUFeatures, temporal_stats: TemporalStats, emotion_vector=None):
-        au4 = au_features.au4_frown
-        au23 = au_features.au23_lip_compression
-        eye_closed = min(au_features.eye_closed_sec / 2.0, 1.0)
         smile_vol = temporal_stats.data.get('au12_smile_volatility', 0)
-        asymmetry = 0.0  # gaze_asymmetry 未在 AUFeatures 中，暂设为0
+        return self.compute_from_array(get_au_vector(au_features), smile_vol, emotion_vector)
 
-        base_tension = (
-            0.3 * au4 +
-            0.25 * au23 +
-            0.2 * eye_closed +
-            0.15 * smile_vol +
-            0.1 * asymmetry
-        )
+    def compute_from_array(self, au_vec, smile_vol=0, emotion_vector=None):
+        """
+        基于按 AU_NUMERIC_FIELDS 排列的 AU 向量计算紧张度
+
+        参数:
+            au_vec: get_au_vector 打包的 AU 向量
+            smile_vol: au12_smile 的时间序列波动（volatility）
+        """
+        au4, au23, eye_closed_sec = au_vec[_TENSION_COLS].tolist()
+        asymmetry = 0.0  # gaze_asymmetry 未在 AUFeatures 中，暂设为0
+        smile_vol = float(smile_vol)
 
-        emotional_boost = 0.0
         if emotion_vector:
-            anxiety = emotion_vector.get('anxiety', 0)
-            anger = emotion_vector.get('anger', 0)
-            fear = emotion_vector.get('fear', 0)
-            moral_disgust = emotion_vector.get('moral_disgust', 0)
-            emotional_boost = max(anxiety, anger, fear, moral_disgust)
-            base_tension = min(base_tension + emotional_boost * 0.3, 1.0)
-
-        tension = min(base_tension, 1.0)
+            # 按固定键序一次取出（map 在 C 层完成查找），缺失的情绪记为 0
+            emo_vals = map(float, map(emotion_vector.get, self.EMO_KEYS, self._EMO_DEFAULTS))
+            tension, eye_closed, emotional_boost = _tension_core(
+                au4, au23, eye_closed_sec, smile_vol, asymmetry, True, *emo_vals)
+        else:
+            tension, eye_closed, emotional_boost = _tension_core(
+                au4, au23, eye_closed_sec, smile_vol, asymmetry, False, *self._EMO_DEFAULTS)
+
         level = "low" if tension < 0.3 else "medium" if tension < 0.6 else "high"
 
         return TensionResult(
             tension_score=round(tension, 3),
             tension_level=level,
-            tension_sources={
-                'brow_furrow': round(au4, 3),
-                'lip_compression': round(au23, 3),
-                'eye_closure': round(eye_closed, 3),
-                'expression_instability': round(smile_vol, 3),
-                'emotional_influence': round(emotional_boost * 0.3, 3)
-            }
+            tension_sources=TensionSources(
+                brow_furrow=round(au4, 3),
+                lip_compression=round(au23, 3),
+                eye_closure=round(eye_closed, 3),
+                expression_instability=round(smile_vol, 3),
+                emotional_influence=round(emotional_boost * 0.3, 3)
+            )
         )
\ No newline at end of file
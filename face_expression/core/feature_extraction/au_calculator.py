@@ -1,256 +1,335 @@
+import math
 import numpy as np
-from scipy.spatial import distance as dist
-from face_expression.models.features import AUFeatures
+from face_expression.models.features import AUFeatures, MOUTH_BASELINE_FIELDS
+from ..jit import njit, NUMBA_AVAILABLE
 from .landmarks import *
 
+# === 关键点索引常量（模块加载时构建一次，逐帧直接用于花式索引） ===
+_LEFT_EYE_EAR_IDX = np.array([33, 160, 159, 133, 153, 144], dtype=np.int32)
+_RIGHT_EYE_EAR_IDX = np.array([362, 387, 386, 263, 380, 373], dtype=np.int32)
+# 左右眼 EAR 的 6 段距离（左 A/B/C、右 A/B/C）在完整关键点数组中的下标
+_BOTH_EYES_EAR_IDX = np.concatenate([_LEFT_EYE_EAR_IDX, _RIGHT_EYE_EAR_IDX])
+_BOTH_EYES_PAIR_A_IDX = _BOTH_EYES_EAR_IDX[EYE_PAIR_A_IDX]
+_BOTH_EYES_PAIR_B_IDX = _BOTH_EYES_EAR_IDX[EYE_PAIR_B_IDX]
 
-class EyeFeatureExtractor:
-    @staticmethod
-    def extract(lm):
-        left_eye_pts = [lm[i] for i in [33, 160, 159, 133, 153, 144]]
-        right_eye_pts = [lm[i] for i in [362, 387, 386, 263, 380, 373]]
-        left_ear = EyeFeatureExtractor._eye_aspect_ratio(left_eye_pts)
-        right_ear = EyeFeatureExtractor._eye_aspect_ratio(right_eye_pts)
-        avg_ear = (left_ear + right_ear) / 2.0
-        au7_eye_squeeze = max(0.0, 1.0 - avg_ear)
+_MOUTH_PAIR_A_IDX = np.array([61, 13, 0], dtype=np.int32)      # 嘴宽 / 唇厚 / 嘴高
+_MOUTH_PAIR_B_IDX = np.array([291, 14, 17], dtype=np.int32)
+_MOUTH_Y_IDX = np.array([13, 152, 164, 61, 291], dtype=np.int32)
+_DIMPLE_IDX = np.array([202, 422], dtype=np.int32)
+_MOUTH_CORNER_IDX = np.array([61, 291], dtype=np.int32)
 
-        # 标准化
-        avg_ear = max(0.0, min(avg_ear, 1.0))
-        au7_eye_squeeze = max(0.0, min(au7_eye_squeeze, 1.0))
+_BROW_PAIR_A_IDX = np.array([276], dtype=np.int32)
+_BROW_PAIR_B_IDX = np.array([33], dtype=np.int32)
+_BROW_RAISE_Y_IDX = np.array([52, 55, 70, 63, 168], dtype=np.int32)
 
-        return {'avg_ear': avg_ear, 'au7_eye_squeeze': au7_eye_squeeze}
+_NOSE_PAIR_A_IDX = np.array([1, 1], dtype=np.int32)
+_NOSE_PAIR_B_IDX = np.array([234, 455], dtype=np.int32)
 
-    @staticmethod
-    def _eye_aspect_ratio(eye_pts):
-        A = dist.euclidean(eye_pts[1], eye_pts[5])
-        B = dist.euclidean(eye_pts[2], eye_pts[4])
-        C = dist.euclidean(eye_pts[0], eye_pts[3])
-        return (A + B) / (2.0 * C)
+_CHEEK_PAIR_A_IDX = np.array([205, 425], dtype=np.int32)
+_CHEEK_PAIR_B_IDX = np.array([145, 374], dtype=np.int32)
 
+_SYMMETRY_EYE_L_IDX = np.array([33, 133], dtype=np.int32)
+_SYMMETRY_EYE_R_IDX = np.array([362, 263], dtype=np.int32)
 
-class MouthFeatureExtractor:
-    def __init__(self):
-        self.rest_mouth_width = None
-        self.rest_lip_thickness = None
-        self.rest_jaw_drop = None
-        self.rest_upper_lip_y = None
-        self.rest_mouth_height = None
-        self.rest_mouth_corner_y = None
-        self.calibration_frames = 0
-        self.max_calibration = 10
-
-    def extract(self, lm, face_width, face_height):
-        mouth_left = np.array(lm[61])
-        mouth_right = np.array(lm[291])
-        upper_lip = np.array(lm[13])
-        lower_lip = np.array(lm[14])
-        mouth_top = np.array(lm[0])
-        mouth_bottom = np.array(lm[17])
-
-        current_mouth_width = dist.euclidean(mouth_left, mouth_right)
-        current_lip_thickness = dist.euclidean(upper_lip, lower_lip)
-        current_jaw_drop = abs(np.array(lm[152])[1] - upper_lip[1])
-        current_upper_lip_y = np.array(lm[164])[1]
-        current_mouth_height = dist.euclidean(mouth_top, mouth_bottom)
-        current_mouth_corner_y = (np.array(lm[61])[1] + np.array(lm[291])[1]) / 2
-
-        if self.calibration_frames < self.max_calibration:
-            if self.rest_mouth_width is None:
-                self.rest_mouth_width = current_mouth_width
-                self.rest_lip_thickness = current_lip_thickness
-                self.rest_jaw_drop = current_jaw_drop
-                self.rest_upper_lip_y = current_upper_lip_y
-                self.rest_mouth_height = current_mouth_height
-                self.rest_mouth_corner_y = current_mouth_corner_y
-            else:
-                alpha = 1.0 / (self.calibration_frames + 1)
-                self.rest_mouth_width = (1 - alpha) * self.rest_mouth_width + alpha * current_mouth_width
-                self.rest_lip_thickness = (1 - alpha) * self.rest_lip_thickness + alpha * current_lip_thickness
-                self.rest_jaw_drop = (1 - alpha) * self.rest_jaw_drop + alpha * current_jaw_drop
-                self.rest_upper_lip_y = (1 - alpha) * self.rest_upper_lip_y + alpha * current_upper_lip_y
-                self.rest_mouth_height = (1 - alpha) * self.rest_mouth_height + alpha * current_mouth_height
-                self.rest_mouth_corner_y = (1 - alpha) * self.rest_mouth_corner_y + alpha * current_mouth_corner_y
-            self.calibration_frames += 1
-
-        rest_mouth_width = self.rest_mouth_width or current_mouth_width
-        rest_lip_thickness = self.rest_lip_thickness or current_lip_thickness
-        rest_jaw_drop = self.rest_jaw_drop or current_jaw_drop
-        rest_upper_lip_y = self.rest_upper_lip_y or current_upper_lip_y
-        rest_mouth_height = self.rest_mouth_height or current_mouth_height
-        rest_mouth_corner_y = self.rest_mouth_corner_y or current_mouth_corner_y
-
-        au12_smile = max(0.0, (current_mouth_width - rest_mouth_width) / (rest_mouth_width + 1e-6))
-        au25_mouth_open = max(0.0, (current_mouth_height - rest_mouth_height) / (rest_mouth_height + 1e-6))
-        au25_mouth_open = min(au25_mouth_open, 1.0)
-        lip_compression_ratio = current_lip_thickness / (rest_lip_thickness + 1e-6)
-        au23_lip_compression = max(0.0, 1.0 - lip_compression_ratio)
-        mouth_corner_down = max(0.0, current_mouth_corner_y - rest_mouth_corner_y)
-        au15_mouth_down = min(mouth_corner_down / face_height, 1.0)
-        au10_upper_lip_raise = max(0.0, (rest_upper_lip_y - current_upper_lip_y) / face_height)
-        dimple_left = np.array(lm[202])
-        dimple_right = np.array(lm[422])
-        left_dimple_depth = dist.euclidean(dimple_left, mouth_left)
-        right_dimple_depth = dist.euclidean(dimple_right, mouth_right)
-        au14_dimpler = min((left_dimple_depth + right_dimple_depth) / (2 * face_width) * 5.0, 1.0)
-        au20_lip_stretcher = max(0.0, (current_mouth_width - rest_mouth_width) / (rest_mouth_width + 1e-6))
-        jaw_drop_change = current_jaw_drop - rest_jaw_drop
-        au26_jaw_drop = max(0.0, jaw_drop_change / (0.1 * face_height))
-
-        # 标准化
-        au12_smile = max(0.0, min(au12_smile, 1.0))
-        au25_mouth_open = max(0.0, min(au25_mouth_open, 1.0))
-        au23_lip_compression = max(0.0, min(au23_lip_compression, 1.0))
-        au15_mouth_down = max(0.0, min(au15_mouth_down, 1.0))
-        au10_upper_lip_raise = max(0.0, min(au10_upper_lip_raise, 1.0))
-        au14_dimpler = max(0.0, min(au14_dimpler, 1.0))
-        au20_lip_stretcher = max(0.0, min(au20_lip_stretcher, 1.0))
-        au26_jaw_drop = max(0.0, min(au26_jaw_drop, 1.0))
-
-        return {
-            'au12_smile': au12_smile,
-            'au25_mouth_open': au25_mouth_open,
-            'au23_lip_compression': au23_lip_compression,
-            'au15_mouth_down': au15_mouth_down,
-            'au10_upper_lip_raise': au10_upper_lip_raise,
-            'au14_dimpler': au14_dimpler,
-            'au20_lip_stretcher': au20_lip_stretcher,
-            'au26_jaw_drop': au26_jaw_drop,
-        }
-
-
-class BrowFeatureExtractor:
-    @staticmethod
-    def extract(lm, face_width):
-        brow_left = np.array(lm[276])
-        brow_right = np.array(lm[33])
-        brow_distance = dist.euclidean(brow_left, brow_right)
-        au4_frown = max(0.0, 1.0 - (brow_distance / face_width))
-        au4_frown = max(0.0, min(au4_frown, 1.0))
-        return {'au4_frown': au4_frown}
+# 全部 AU 用到的关键点对，按顺序依次为：左眼 EAR 三段、右眼 EAR 三段、嘴宽/唇厚/嘴高、
+# 左右酒窝、眉间距、鼻翼两侧、左右脸颊——一次花式索引 + 一次 norm 得到所有距离
+_ALL_PAIR_A_IDX = np.concatenate([
+    _BOTH_EYES_PAIR_A_IDX, _MOUTH_PAIR_A_IDX, _DIMPLE_IDX, _BROW_PAIR_A_IDX, _NOSE_PAIR_A_IDX, _CHEEK_PAIR_A_IDX,
+])
+_ALL_PAIR_B_IDX = np.concatenate([
+    _BOTH_EYES_PAIR_B_IDX, _MOUTH_PAIR_B_IDX, _MOUTH_CORNER_IDX, _BROW_PAIR_B_IDX, _NOSE_PAIR_B_IDX, _CHEEK_PAIR_B_IDX,
+])
+# 需要的 y 坐标：嘴部 5 点、眉部 5 点、对称性眼角 4 点、鼻尖；x 坐标：鼻尖与左右脸颊
+_ALL_Y_IDX = np.concatenate([_MOUTH_Y_IDX, _BROW_RAISE_Y_IDX, _SYMMETRY_EYE_L_IDX, _SYMMETRY_EYE_R_IDX,
+                             np.array([1], dtype=np.int32)])
+_ALL_X_IDX = np.array([1, 234, 455], dtype=np.int32)
 
+# AUFeatures 全部字段名：calculate 先以 0.0 填满，再写入实际计算结果（导入时求一次）
+_AU_FIELD_DEFAULTS = dict.fromkeys(AUFeatures.__dataclass_fields__, 0.0)
 
-class BrowRaiserExtractor:
-    @staticmethod
-    def extract(lm, face_width, face_height):
-        inner_brow_left = np.array(lm[52])
-        inner_brow_right = np.array(lm[55])
-        outer_brow_left = np.array(lm[70])
-        outer_brow_right = np.array(lm[63])
-        brow_center = np.array(lm[168])
+# 左右虹膜各 4 个轮廓点（468~471、473~476），一次收集后 reshape 为 (2, 4, 2) 求中心
+_IRIS_IDX = np.array([468, 469, 470, 471, 473, 474, 475, 476], dtype=np.int32)
 
-        inner_lift_left = brow_center[1] - inner_brow_left[1]
-        inner_lift_right = brow_center[1] - inner_brow_right[1]
-        outer_lift_left = brow_center[1] - outer_brow_left[1]
-        outer_lift_right = brow_center[1] - outer_brow_right[1]
 
-        au1_inner_brow_raise = max(0.0, (inner_lift_left + inner_lift_right) / (2 * face_height))
-        au2_outer_brow_raise = max(0.0, (outer_lift_left + outer_lift_right) / (2 * face_height))
+def _pair_distances(pts, idx_a, idx_b):
+    """批量计算关键点对 (idx_a[k], idx_b[k]) 之间的欧氏距离，返回 Python float 列表"""
+    return np.linalg.norm(pts[idx_a] - pts[idx_b], axis=1).tolist()
 
-        au1_inner_brow_raise = max(0.0, min(au1_inner_brow_raise, 1.0))
-        au2_outer_brow_raise = max(0.0, min(au2_outer_brow_raise, 1.0))
-
-        return {
-            'au1_inner_brow_raise': au1_inner_brow_raise,
-            'au2_outer_brow_raise': au2_outer_brow_raise
-        }
 
+class MouthFeatureExtractor:
+    def __init__(self):
+        # 静息基线：嘴宽、唇厚、下颌张开、上唇高度、嘴高、嘴角高度（顺序同 _measure），
+        # 保存在一个 (6,) 向量中整体做滑动平均
+        self._rest_vec = None
+        self.calibration_frames = 0
+        self.max_calibration = 10
+        self._calibrated = False
+        self._rest = None  # 当前基线值元组（_rest_vec 的 Python float 副本，供标量运算使用）
 
-class NoseFeatureExtractor:
-    @staticmethod
-    def extract(lm, face_width, face_height):
-        nose_tip = np.array(lm[1])
-        nose_wing_left = np.array(lm[234])
-        nose_wing_right = np.array(lm[455])
-        au9_nose_wrinkle = max(0.0, 1.0 - (
-                dist.euclidean(nose_tip, nose_wing_left) +
-                dist.euclidean(nose_tip, nose_wing_right)
-        ) / (2 * face_width))
-        au9_nose_wrinkle = max(0.0, min(au9_nose_wrinkle, 1.0))
-        return {'au9_nose_wrinkle': au9_nose_wrinkle}
-
-
-class HeadPoseExtractor:
-    @staticmethod
-    def extract(lm, face_width, face_height):
-        nose_tip = np.array(lm[1])
-        cheek_left = np.array(lm[234])
-        cheek_right = np.array(lm[455])
-        ear_mid = (cheek_left + cheek_right) / 2
-        head_yaw = (nose_tip[0] - ear_mid[0]) / face_width
-        chin = np.array(lm[152])
-        head_pitch = (nose_tip[1] - chin[1]) / face_height
-        return {
-            'head_yaw': head_yaw,
-            'head_pitch': head_pitch
-        }
-
-
-class CheekFeatureExtractor:
-    @staticmethod
-    def extract(lm, face_width, face_height):
-        cheek_top_left = np.array(lm[205])
-        cheek_top_right = np.array(lm[425])
-        eye_bottom_left = np.array(lm[145])
-        eye_bottom_right = np.array(lm[374])
-        left_cheek_lift = dist.euclidean(cheek_top_left, eye_bottom_left)
-        right_cheek_lift = dist.euclidean(cheek_top_right, eye_bottom_right)
-        au6_cheek_raise = 1.0 - (left_cheek_lift + right_cheek_lift) / (2 * face_height)
-        au6_cheek_raise = max(0.0, min(au6_cheek_raise, 1.0))
-        return {'au6_cheek_raise': au6_cheek_raise}
-
-
-class SymmetryExtractor:
     @staticmethod
-    def extract(lm):
-        left_eye_center = np.mean([lm[i] for i in [33, 133]], axis=0)
-        right_eye_center = np.mean([lm[i] for i in [362, 263]], axis=0)
-        mouth_left = np.array(lm[61])
-        mouth_right = np.array(lm[291])
-        eye_y_diff = abs(left_eye_center[1] - right_eye_center[1])
-        mouth_y_diff = abs(mouth_left[1] - mouth_right[1])
-        symmetry_score = max(0.0, min(1.0, 1.0 - (eye_y_diff + mouth_y_diff)))
-        return {'symmetry_score': symmetry_score}
-
-
-# === 新增：眼球特征提取器 ===
-class IrisFeatureExtractor:
-    @staticmethod
-    def extract(lm, face_width, face_height):
-        # 左眼虹膜中心（MediaPipe 索引 468, 469, 470, 471）
-        left_iris = np.array([lm[468], lm[469], lm[470], lm[471]])
-        right_iris = np.array([lm[473], lm[474], lm[475], lm[476]])
-
-        # 计算平均位置
-        left_iris_center = np.mean(left_iris, axis=0)
-        right_iris_center = np.mean(right_iris, axis=0)
-
-        # 归一化坐标
-        left_iris_x = left_iris_center[0]
-        left_iris_y = left_iris_center[1]
-        right_iris_x = right_iris_center[0]
-        right_iris_y = right_iris_center[1]
-
-        # 计算视线方向（基于瞳孔与鼻尖的相对位置）
-        nose_tip = np.array(lm[1])
-        eye_mid = (left_iris_center + right_iris_center) / 2
-
-        # 水平偏移：正数表示向右看，负数表示向左看
-        gaze_direction_x = (eye_mid[0] - nose_tip[0]) / face_width
-        # 垂直偏移：正数表示向上看，负数表示向下看
-        gaze_direction_y = (eye_mid[1] - nose_tip[1]) / face_height
-
-        # 视线偏离度（综合水平+垂直偏移）
-        gaze_deviation = np.sqrt(gaze_direction_x ** 2 + gaze_direction_y ** 2)
-
-        return {
-            'left_iris_x': left_iris_x,
-            'left_iris_y': left_iris_y,
-            'right_iris_x': right_iris_x,
-            'right_iris_y': right_iris_y,
-            'gaze_direction_x': gaze_direction_x,
-            'gaze_direction_y': gaze_direction_y,
-            'gaze_deviation': gaze_deviation
-        }
+    def _measure(pts):
+        """测量当前帧的嘴宽、唇厚、下颌张开、上唇高度、嘴高、嘴角高度"""
+        current_mouth_width, current_lip_thickness, current_mouth_height = _pair_distances(
+            pts, _MOUTH_PAIR_A_IDX, _MOUTH_PAIR_B_IDX)
+        upper_lip_y, chin_y, current_upper_lip_y, corner_left_y, corner_right_y = \
+            pts[_MOUTH_Y_IDX, 1].tolist()
+        current_jaw_drop = abs(chin_y - upper_lip_y)
+        current_mouth_corner_y = (corner_left_y + corner_right_y) / 2
+        return (current_mouth_width, current_lip_thickness, current_jaw_drop,
+                current_upper_lip_y, current_mouth_height, current_mouth_corner_y)
+
+    def _update_calibration(self, current):
+        """用当前测量值更新静息基线，返回本帧使用的基线值（顺序同 _measure）"""
+        if self._calibrated:
+            # 标定完成后基线不再变化，直接返回缓存的基线
+            return self._rest
+
+        current = np.array(current, dtype=np.float64)
+        if self._rest_vec is None:
+            self._rest_vec = current
+        else:
+            # 六个基线一次向量化更新
+            alpha = 1.0 / (self.calibration_frames + 1)
+            self._rest_vec *= 1 - alpha
+            self._rest_vec += alpha * current
+        self.calibration_frames += 1
+        self._calibrated = self.calibration_frames >= self.max_calibration
+
+        self._rest = tuple(self._rest_vec.tolist())
+        return self._rest
+
+    def calibrate(self, pts):
+        """仅更新静息基线并返回基线值，供融合内核使用（标定完成后无需再测量）"""
+        if self._calibrated:
+            return self._rest
+        return self._update_calibration(self._measure(pts))
+
+
+# === 融合 AU 计算内核（numba 可用时启用） ===
+# 内核输出数组中各字段的顺序
+_KERNEL_FIELDS = (
+    'avg_ear', 'au7_eye_squeeze',
+    'au12_smile', 'au25_mouth_open', 'au23_lip_compression', 'au15_mouth_down',
+    'au10_upper_lip_raise', 'au14_dimpler', 'au20_lip_stretcher', 'au26_jaw_drop',
+    'au4_frown', 'au1_inner_brow_raise', 'au2_outer_brow_raise',
+    'au9_nose_wrinkle', 'au6_cheek_raise',
+    'head_yaw', 'head_pitch', 'symmetry_score',
+    'left_iris_x', 'left_iris_y', 'right_iris_x', 'right_iris_y',
+    'gaze_direction_x', 'gaze_direction_y', 'gaze_deviation',
+)
+
+
+@njit(cache=True, fastmath=True)
+def _dist(pts, i, j):
+    dx = pts[i, 0] - pts[j, 0]
+    dy = pts[i, 1] - pts[j, 1]
+    return math.sqrt(dx * dx + dy * dy)
+
+
+@njit(cache=True, fastmath=True)
+def _clip01(v):
+    return max(0.0, min(v, 1.0))
+
+
+@njit(cache=True, fastmath=True)
+def _mean_point(pts, start, count):
+    """pts[start:start + count] 的中心点 (x, y)"""
+    sx = 0.0
+    sy = 0.0
+    for i in range(start, start + count):
+        sx += pts[i, 0]
+        sy += pts[i, 1]
+    return sx / count, sy / count
+
+
+# 显式 float32 签名：模块导入时即完成编译，并要求输入为 C 连续的 (N, 2) float32 数组
+_AU_KERNEL_SIGNATURE = 'float64[::1](float32[:, ::1], ' + ', '.join(['float64'] * 8) + ')'
+
+
+@njit(_AU_KERNEL_SIGNATURE, cache=True, fastmath=True)
+def _compute_au_array(pts, fw, fh, rest_mouth_width, rest_lip_thickness, rest_jaw_drop,
+                      rest_upper_lip_y, rest_mouth_height, rest_mouth_corner_y):
+    """
+    全部 AU 公式融合为一个内核，结果按 _KERNEL_FIELDS 顺序写入输出数组
+
+    同一组公式另有 NumPy 单帧版 _compute_au_values 与批量版 _compute_au_batch，
+    修改任一处时需同步另外两处（examples/check_au_paths.py 校验三者一致）
+    """
+    out = np.empty(25, dtype=np.float64)
+
+    # 眼部 EAR
+    left_ear = (_dist(pts, 160, 144) + _dist(pts, 159, 153)) / (2.0 * _dist(pts, 33, 133))
+    right_ear = (_dist(pts, 387, 373) + _dist(pts, 386, 380)) / (2.0 * _dist(pts, 362, 263))
+    avg_ear = (left_ear + right_ear) / 2.0
+    out[0] = _clip01(avg_ear)
+    out[1] = _clip01(1.0 - avg_ear)
+
+    # 嘴部
+    mouth_width = _dist(pts, 61, 291)
+    lip_thickness = _dist(pts, 13, 14)
+    mouth_height = _dist(pts, 0, 17)
+    jaw_drop = abs(pts[152, 1] - pts[13, 1])
+    upper_lip_y = pts[164, 1]
+    mouth_corner_y = (pts[61, 1] + pts[291, 1]) / 2
+    out[2] = _clip01((mouth_width - rest_mouth_width) / (rest_mouth_width + 1e-6))
+    out[3] = _clip01((mouth_height - rest_mouth_height) / (rest_mouth_height + 1e-6))
+    out[4] = _clip01(1.0 - lip_thickness / (rest_lip_thickness + 1e-6))
+    out[5] = _clip01(max(0.0, mouth_corner_y - rest_mouth_corner_y) / fh)
+    out[6] = _clip01((rest_upper_lip_y - upper_lip_y) / fh)
+    out[7] = _clip01((_dist(pts, 202, 61) + _dist(pts, 422, 291)) / (2 * fw) * 5.0)
+    out[8] = out[2]
+    out[9] = _clip01((jaw_drop - rest_jaw_drop) / (0.1 * fh))
+
+    # 眉部
+    out[10] = _clip01(1.0 - _dist(pts, 276, 33) / fw)
+    brow_center_y = pts[168, 1]
+    out[11] = _clip01(((brow_center_y - pts[52, 1]) + (brow_center_y - pts[55, 1])) / (2 * fh))
+    out[12] = _clip01(((brow_center_y - pts[70, 1]) + (brow_center_y - pts[63, 1])) / (2 * fh))
+
+    # 鼻部 / 脸颊
+    out[13] = _clip01(1.0 - (_dist(pts, 1, 234) + _dist(pts, 1, 455)) / (2 * fw))
+    out[14] = _clip01(1.0 - (_dist(pts, 205, 145) + _dist(pts, 425, 374)) / (2 * fh))
+
+    # 头部姿态
+    out[15] = (pts[1, 0] - (pts[234, 0] + pts[455, 0]) / 2) / fw
+    out[16] = (pts[1, 1] - pts[152, 1]) / fh
+
+    # 对称性
+    eye_y_diff = abs((pts[33, 1] + pts[133, 1]) / 2 - (pts[362, 1] + pts[263, 1]) / 2)
+    mouth_y_diff = abs(pts[61, 1] - pts[291, 1])
+    out[17] = _clip01(1.0 - (eye_y_diff + mouth_y_diff))
+
+    # 虹膜 / 视线
+    left_iris_x, left_iris_y = _mean_point(pts, 468, 4)
+    right_iris_x, right_iris_y = _mean_point(pts, 473, 4)
+    out[18] = left_iris_x
+    out[19] = left_iris_y
+    out[20] = right_iris_x
+    out[21] = right_iris_y
+    out[22] = ((left_iris_x + right_iris_x) / 2 - pts[1, 0]) / fw
+    out[23] = ((left_iris_y + right_iris_y) / 2 - pts[1, 1]) / fh
+    out[24] = math.sqrt(out[22] * out[22] + out[23] * out[23])
+    return out
+
+
+def _compute_au_values(pts, face_width, face_height, mouth_extractor):
+    """
+    融合内核的 NumPy 版本（numba 不可用时使用）：一次收集全部点对距离与坐标，
+    其余均为标量运算，结果按 _KERNEL_FIELDS 顺序返回
+    """
+    (left_a, left_b, left_c, right_a, right_b, right_c,
+     mouth_width, lip_thickness, mouth_height, dimple_left, dimple_right,
+     brow_distance, nose_left, nose_right, cheek_left, cheek_right) = \
+        np.linalg.norm(pts[_ALL_PAIR_A_IDX] - pts[_ALL_PAIR_B_IDX], axis=1).tolist()
+    (upper_lip_y, chin_y, lip_top_y, corner_left_y, corner_right_y,
+     inner_left_y, inner_right_y, outer_left_y, outer_right_y, brow_center_y,
+     eye_l_outer_y, eye_l_inner_y, eye_r_inner_y, eye_r_outer_y, nose_y) = pts[_ALL_Y_IDX, 1].tolist()
+    nose_x, cheek_left_x, cheek_right_x = pts[_ALL_X_IDX, 0].tolist()
+    (left_iris_x, left_iris_y), (right_iris_x, right_iris_y) = \
+        pts[_IRIS_IDX].reshape(2, 4, 2).mean(axis=1).tolist()
+    fw, fh = face_width, face_height
+
+    def clip01(v):
+        return max(0.0, min(v, 1.0))
+
+    # 眼部
+    avg_ear = ((left_a + left_b) / (2.0 * left_c) + (right_a + right_b) / (2.0 * right_c)) / 2.0
+
+    # 嘴部（基线由嘴部提取器维护）
+    jaw_drop = abs(chin_y - upper_lip_y)
+    mouth_corner_y = (corner_left_y + corner_right_y) / 2
+    (rest_mouth_width, rest_lip_thickness, rest_jaw_drop,
+     rest_upper_lip_y, rest_mouth_height, rest_mouth_corner_y) = mouth_extractor._update_calibration(
+        (mouth_width, lip_thickness, jaw_drop, lip_top_y, mouth_height, mouth_corner_y))
+    au12_smile = clip01((mouth_width - rest_mouth_width) / (rest_mouth_width + 1e-6))
+
+    eye_y_diff = abs((eye_l_outer_y + eye_l_inner_y) / 2 - (eye_r_inner_y + eye_r_outer_y) / 2)
+    mouth_y_diff = abs(corner_left_y - corner_right_y)
+
+    gaze_direction_x = ((left_iris_x + right_iris_x) / 2 - nose_x) / fw
+    gaze_direction_y = ((left_iris_y + right_iris_y) / 2 - nose_y) / fh
+
+    return (
+        clip01(avg_ear),
+        clip01(1.0 - avg_ear),
+        au12_smile,
+        clip01((mouth_height - rest_mouth_height) / (rest_mouth_height + 1e-6)),
+        clip01(1.0 - lip_thickness / (rest_lip_thickness + 1e-6)),
+        clip01(max(0.0, mouth_corner_y - rest_mouth_corner_y) / fh),
+        clip01((rest_upper_lip_y - lip_top_y) / fh),
+        clip01((dimple_left + dimple_right) / (2 * fw) * 5.0),
+        au12_smile,
+        clip01((jaw_drop - rest_jaw_drop) / (0.1 * fh)),
+        clip01(1.0 - brow_distance / fw),
+        clip01(((brow_center_y - inner_left_y) + (brow_center_y - inner_right_y)) / (2 * fh)),
+        clip01(((brow_center_y - outer_left_y) + (brow_center_y - outer_right_y)) / (2 * fh)),
+        clip01(1.0 - (nose_left + nose_right) / (2 * fw)),
+        clip01(1.0 - (cheek_left + cheek_right) / (2 * fh)),
+        (nose_x - (cheek_left_x + cheek_right_x) / 2) / fw,
+        (nose_y - chin_y) / fh,
+        clip01(1.0 - (eye_y_diff + mouth_y_diff)),
+        left_iris_x, left_iris_y, right_iris_x, right_iris_y,
+        gaze_direction_x, gaze_direction_y, math.hypot(gaze_direction_x, gaze_direction_y),
+    )
+
+
+def _compute_au_batch(pts_batch, fw, fh):
+    """
+    _compute_au_array 的批量 NumPy 版本
+
+    pts_batch: (B, N, 2) float64；fw, fh: (B,)
+    静态图像没有嘴部静息基线，MOUTH_BASELINE_FIELDS 全部置 0（调用方应视为不可用），
+    返回 {字段名: (B,) 数组}
+    """
+    clip = lambda v: np.clip(v, 0.0, 1.0)
+    (left_a, left_b, left_c, right_a, right_b, right_c,
+     _, _, _, dimple_left, dimple_right,
+     brow_distance, nose_left, nose_right, cheek_left, cheek_right) = \
+        np.linalg.norm(pts_batch[:, _ALL_PAIR_A_IDX] - pts_batch[:, _ALL_PAIR_B_IDX], axis=-1).T
+    (_, chin_y, _, corner_left_y, corner_right_y,
+     inner_left_y, inner_right_y, outer_left_y, outer_right_y, brow_center_y,
+     eye_l_outer_y, eye_l_inner_y, eye_r_inner_y, eye_r_outer_y, nose_y) = pts_batch[:, _ALL_Y_IDX, 1].T
+    nose_x, cheek_left_x, cheek_right_x = pts_batch[:, _ALL_X_IDX, 0].T
+    out = {}
+
+    # 眼部 EAR
+    avg_ear = ((left_a + left_b) / (2.0 * left_c) + (right_a + right_b) / (2.0 * right_c)) / 2.0
+    out['avg_ear'] = clip(avg_ear)
+    out['au7_eye_squeeze'] = clip(1.0 - avg_ear)
+
+    # 嘴部：相对静息基线的 AU 没有基线可比，置 0；酒窝深度不依赖基线
+    zeros = np.zeros(len(pts_batch))
+    for name in MOUTH_BASELINE_FIELDS:
+        out[name] = zeros
+    out['au14_dimpler'] = clip((dimple_left + dimple_right) / (2 * fw) * 5.0)
+
+    # 眉部
+    out['au4_frown'] = clip(1.0 - brow_distance / fw)
+    out['au1_inner_brow_raise'] = clip(((brow_center_y - inner_left_y) + (brow_center_y - inner_right_y)) / (2 * fh))
+    out['au2_outer_brow_raise'] = clip(((brow_center_y - outer_left_y) + (brow_center_y - outer_right_y)) / (2 * fh))
+
+    # 鼻部 / 脸颊
+    out['au9_nose_wrinkle'] = clip(1.0 - (nose_left + nose_right) / (2 * fw))
+    out['au6_cheek_raise'] = clip(1.0 - (cheek_left + cheek_right) / (2 * fh))
+
+    # 头部姿态
+    out['head_yaw'] = (nose_x - (cheek_left_x + cheek_right_x) / 2) / fw
+    out['head_pitch'] = (nose_y - chin_y) / fh
+
+    # 对称性
+    eye_y_diff = np.abs((eye_l_outer_y + eye_l_inner_y) / 2 - (eye_r_inner_y + eye_r_outer_y) / 2)
+    mouth_y_diff = np.abs(corner_left_y - corner_right_y)
+    out['symmetry_score'] = clip(1.0 - (eye_y_diff + mouth_y_diff))
+
+    # 虹膜 / 视线
+    left_iris, right_iris = pts_batch[:, _IRIS_IDX].reshape(-1, 2, 4, 2).mean(axis=2).transpose(1, 0, 2)
+    out['left_iris_x'], out['left_iris_y'] = left_iris.T
+    out['right_iris_x'], out['right_iris_y'] = right_iris.T
+    eye_mid = (left_iris + right_iris) / 2
+    out['gaze_direction_x'] = (eye_mid[:, 0] - nose_x) / fw
+    out['gaze_direction_y'] = (eye_mid[:, 1] - nose_y) / fh
+    out['gaze_deviation'] = np.hypot(out['gaze_direction_x'], out['gaze_direction_y'])
+    return out
 
 
 class AUFeatureCalculator:
@@ -259,25 +338,47 @@ class AUFeatureCalculator:
         self.save_landmarks = save_landmarks
 
     def calculate(self, landmarks_norm, face_width, face_height) -> AUFeatures:
-        features = {}
-        features.update(EyeFeatureExtractor.extract(landmarks_norm))
-        features.update(self.mouth_extractor.extract(landmarks_norm, face_width, face_height))
-        features.update(BrowFeatureExtractor.extract(landmarks_norm, face_width))
-        features.update(BrowRaiserExtractor.extract(landmarks_norm, face_width, face_height))
-        features.update(NoseFeatureExtractor.extract(landmarks_norm, face_width, face_height))
-        features.update(CheekFeatureExtractor.extract(landmarks_norm, face_width, face_height))
-        features.update(HeadPoseExtractor.extract(landmarks_norm, face_width, face_height))
-        features.update(SymmetryExtractor.extract(landmarks_norm))
-        features.update(IrisFeatureExtractor.extract(landmarks_norm, face_width, face_height))
-
-        # 补充缺失字段（默认0）
-        all_fields = {f.name for f in AUFeatures.__dataclass_fields__.values()}
-        for field in all_fields:
-            if field not in features:
-                features[field] = 0.0
-
-        # 可选：保存原始 landmarks
-        if self.save_landmarks:
-            features['landmarks'] = [pt[0] for pt in landmarks_norm] + [pt[1] for pt in landmarks_norm]
+        # 统一转换为 C 连续的 (N, 2) float32 数组；调用方已传入此类数组时不会复制
+        pts = np.ascontiguousarray(landmarks_norm, dtype=np.float32)
+
+        if NUMBA_AVAILABLE:
+            rest = self.mouth_extractor.calibrate(pts)
+            values = _compute_au_array(pts, float(face_width), float(face_height), *rest).tolist()
+        else:
+            values = _compute_au_values(pts, face_width, face_height, self.mouth_extractor)
 
-        return AUFeatures(**features)
\ No newline at end of file
+        # 未计算的字段保持默认 0
+        features = _AU_FIELD_DEFAULTS.copy()
+        features.update(zip(_KERNEL_FIELDS, values))
+
+        # 可选：保存原始 landmarks（先全部 x 后全部 y；转置后一次 ravel + tolist，不逐点遍历）
+        if self.save_landmarks:
+            features['landmarks'] = np.asarray(landmarks_norm)[:, :2].T.ravel().tolist()
+
+        return AUFeatures(**features)
+
+    def calculate_batch(self, landmarks_batch, face_widths, face_heights):
+        """
+        批量计算多张静态图像的 AU 特征
+
+        参数:
+            landmarks_batch: (B, N, 2) 归一化关键点
+            face_widths, face_heights: (B,) 每张图像的脸宽、脸高
+        返回:
+            AUFeatures 列表。每张图像独立处理，不读写 self 的标定状态；
+            没有嘴部静息基线，MOUTH_BASELINE_FIELDS 恒为 0，应视为不可用
+        """
+        pts_batch = np.asarray(landmarks_batch, dtype=np.float64)
+        fw = np.asarray(face_widths, dtype=np.float64)
+        fh = np.asarray(face_heights, dtype=np.float64)
+        columns = _compute_au_batch(pts_batch, fw, fh)
+
+        names = tuple(columns)
+        rows = np.column_stack([columns[name] for name in names]).tolist()
+        results = []
+        for i, row in enumerate(rows):
+            features = dict(zip(names, row))
+            if self.save_landmarks:
+                features['landmarks'] = pts_batch[i, :, :2].T.ravel().tolist()
+            results.append(AUFeatures(**features))
+        return results
@@ -1,14 +1,27 @@
 from typing import List
 
+import numpy as np
+
 # 眼睛区域
 LEFT_EYE: List[int] = [362, 382, 381, 380, 374, 373, 390, 249, 263, 466, 388, 387, 386, 385, 384, 398]
+LEFT_EYE_IDX = np.array(LEFT_EYE, dtype=np.int32)
 RIGHT_EYE: List[int] = [33, 7, 163, 144, 145, 153, 154, 155, 133, 173, 157, 158, 159, 160, 161, 246]
+RIGHT_EYE_IDX = np.array(RIGHT_EYE, dtype=np.int32)
 LEFT_EYE_UPPER: List[int] = [159, 158, 157]
+LEFT_EYE_UPPER_IDX = np.array(LEFT_EYE_UPPER, dtype=np.int32)
 RIGHT_EYE_UPPER: List[int] = [386, 385, 384]
+RIGHT_EYE_UPPER_IDX = np.array(RIGHT_EYE_UPPER, dtype=np.int32)
+
+# EAR 计算用的眼部子数组下标：两只眼各 6 个 EAR 点堆叠为 (12, 2)，
+# 每只眼的 A/B/C 三段距离分别为 (1,5)、(2,4)、(0,3)，右眼整体偏移 6
+EYE_PAIR_A_IDX = np.array([1, 2, 0, 7, 8, 6], dtype=np.int32)
+EYE_PAIR_B_IDX = np.array([5, 4, 3, 11, 10, 9], dtype=np.int32)
 
 # 眉毛区域
 LEFT_EYEBROW_UPPER: List[int] = [107, 105, 104, 103, 102]
+LEFT_EYEBROW_UPPER_IDX = np.array(LEFT_EYEBROW_UPPER, dtype=np.int32)
 RIGHT_EYEBROW_UPPER: List[int] = [336, 334, 333, 332, 331]
+RIGHT_EYEBROW_UPPER_IDX = np.array(RIGHT_EYEBROW_UPPER, dtype=np.int32)
 BROW_CENTER_LEFT: int = 66
 BROW_CENTER_RIGHT: int = 296
 
@@ -0,0 +1,23 @@
+"""
+JIT 编译支持
+
+numba 为可选依赖：安装后数值内核通过 numba.njit 编译为本地代码；
+未安装时 njit 退化为原样返回函数，调用方可根据 NUMBA_AVAILABLE 选择 NumPy 实现。
+"""
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+    def njit(*args, **kwargs):
+        """numba 缺失时的占位装饰器，同时支持 @njit 与 @njit(...) 两种写法"""
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+
+        def decorator(func):
+            return func
+        return decorator
+
+__all__ = ['njit', 'NUMBA_AVAILABLE']
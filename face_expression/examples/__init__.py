@@ -3,6 +3,8 @@ JingXin - Face Expression 模块
 面部微表情分析核心模块，支持实时视频与静态图片分析。
 """
 
+import threading
+
 # 导出分析器类（使用绝对路径）
 from face_expression.pipeline.video_pipeline import VideoPipeline as FaceAUAnalyzer
 from face_expression.pipeline.image_pipeline import ImagePipeline as StaticFaceAnalyzer
@@ -10,10 +12,15 @@ from face_expression.pipeline.image_pipeline import ImagePipeline as StaticFaceA
 # 导出情绪推断函数
 from face_expression.core.analysis.emotion_engine import EmotionEngine
 
+# EmotionEngine 内部复用工作缓冲区（非线程安全）：每个线程缓存一个实例，避免每次调用重新创建
+_thread_local = threading.local()
+
 # 辅助函数：方便外部调用
 def infer_emotion_from_au(au_features, temporal_stats=None, micro_expressions=None):
     """从 AU 特征推断情绪（兼容旧接口）"""
-    engine = EmotionEngine()
+    engine = getattr(_thread_local, "emotion_engine", None)
+    if engine is None:
+        engine = _thread_local.emotion_engine = EmotionEngine()
     return engine.infer(au_features, temporal_stats, micro_expressions)
 
 __version__ = "1.0.0"
@@ -0,0 +1,64 @@
+"""
+校验 AU 计算的三条路径结果一致：融合内核 _compute_au_array、NumPy 单帧版
+_compute_au_values、批量版 _compute_au_batch
+
+三处各自维护一份公式，修改其中任一处后运行本脚本：
+    python face_expression/examples/check_au_paths.py
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+
+# 添加项目根目录到 Python 路径
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from face_expression.core.feature_extraction.au_calculator import (
+    MouthFeatureExtractor, NUMBA_AVAILABLE, _KERNEL_FIELDS,
+    _compute_au_array, _compute_au_batch, _compute_au_values,
+)
+from face_expression.models.features import MOUTH_BASELINE_FIELDS
+
+NUM_LANDMARKS = 478  # FaceMesh refine_landmarks=True 的关键点数
+# 内核输入为 float32，允许单精度量级的误差（虹膜坐标为像素值，需要相对误差）
+RTOL = 1e-6
+ATOL = 1e-5
+
+
+def _random_face(rng):
+    """生成一组随机关键点（归一化坐标乘以画面尺寸），只用于比较公式，不要求像真实人脸"""
+    return (rng.uniform(0.3, 0.7, size=(NUM_LANDMARKS, 2)) * (640, 480)).astype(np.float32)
+
+
+def check(seed=0, trials=20):
+    """比较三条路径的输出，不一致时抛出 AssertionError"""
+    rng = np.random.default_rng(seed)
+    for _ in range(trials):
+        pts = _random_face(rng)
+        fw, fh = rng.uniform(100.0, 300.0, size=2)
+
+        # 先用另一组关键点完成嘴部标定，使基线与当前帧不同，覆盖嘴部 AU 公式
+        mouth = MouthFeatureExtractor()
+        calib_pts = _random_face(rng)
+        for _ in range(mouth.max_calibration):
+            rest = mouth.calibrate(calib_pts)
+
+        kernel = _compute_au_array(pts, fw, fh, *rest)
+        fallback = np.array(_compute_au_values(pts, fw, fh, mouth))
+        np.testing.assert_allclose(kernel, fallback, rtol=RTOL, atol=ATOL,
+                                   err_msg="融合内核与 NumPy 单帧版不一致")
+
+        # 批量路径没有嘴部基线，MOUTH_BASELINE_FIELDS 不参与比较
+        batch = _compute_au_batch(pts[None].astype(np.float64), np.array([fw]), np.array([fh]))
+        for i, name in enumerate(_KERNEL_FIELDS):
+            if name in MOUTH_BASELINE_FIELDS:
+                continue
+            np.testing.assert_allclose(batch[name][0], kernel[i], rtol=RTOL, atol=ATOL,
+                                       err_msg=f"批量版字段 {name} 与融合内核不一致")
+
+
+if __name__ == "__main__":
+    check()
+    print(f"✅ AU 三条计算路径结果一致（numba {'已启用' if NUMBA_AVAILABLE else '未启用'}）")
@@ -1,6 +1,9 @@
 import os
 import csv
 import sys
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 # 添加项目根目录到 Python 路径
@@ -9,17 +12,95 @@ sys.path.insert(0, str(project_root))
 
 # 使用绝对导入
 try:
-    from face_expression.analyzers.image_analyzer import StaticFaceAnalyzer
+    from face_expression import StaticFaceAnalyzer
+    from face_expression.pipeline import get_shared_face_mesh_pool
 except ImportError as e:
     print(f"❌ 导入失败: {e}")
     print("请确保已在项目根目录运行，或已正确安装 face_expression 模块")
     exit(1)
 
+IMAGE_SUFFIXES = {'.jpg', '.jpeg', '.png', '.bmp', '.webp'}
+
+LOG_FIELDNAMES = [
+    "timestamp", "image_path", "focus_score", "blink_status", "au4_frown", "au1_inner_brow_raise",
+    "au12_smile", "au9_nose_wrinkle", "au15_mouth_down", "au25_mouth_open", "eye_closed_sec", "emotion"
+]
+
+# 批量模式下每个工作线程持有独立的分析器（内部缓冲区非线程安全），FaceMesh 由共享池提供
+_thread_local = threading.local()
+
+
+def _analyze_in_thread(image_path):
+    analyzer = getattr(_thread_local, "analyzer", None)
+    if analyzer is None:
+        analyzer = _thread_local.analyzer = StaticFaceAnalyzer()
+    try:
+        return analyzer.analyze_image(str(image_path))
+    except Exception as e:
+        print(f"⚠️ 分析失败 {image_path}: {e}")
+        return None
+
+
+def format_au(value):
+    """格式化 AU 数值；单张图片无法测量的嘴部 AU 为 None"""
+    return "N/A（单张图片无嘴部静息基线）" if value is None else value
+
+
+def append_log(log_path, rows):
+    """追加写入分析结果；第一次运行时（文件不存在）先写表头，只打开一次文件"""
+    write_header = not log_path.exists()
+    with open(log_path, 'a', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=LOG_FIELDNAMES, extrasaction='ignore')
+        if write_header:
+            writer.writeheader()
+        writer.writerows(rows)
+
+
+def analyze_folder(folder, n_jobs, log_path):
+    """
+    批量分析目录中的全部图片
+
+    MediaPipe 推理期间释放 GIL，多线程即可并行；各线程复用自己的分析器，
+    共享 FaceMesh 池的上限与线程数一致。结果按文件名顺序统一写入 CSV。
+    """
+    files = sorted(p for p in Path(folder).iterdir() if p.suffix.lower() in IMAGE_SUFFIXES)
+    if not files:
+        print(f"⚠️ 目录中没有图片: {folder}")
+        return
+
+    get_shared_face_mesh_pool(max_size=n_jobs)
+    with ThreadPoolExecutor(max_workers=n_jobs, thread_name_prefix="image_analyze") as executor:
+        results = list(executor.map(_analyze_in_thread, files))
+
+    rows = []
+    for image_path, features in zip(files, results):
+        if features is None:
+            print(f"⚠️ 未检测到人脸: {image_path}")
+            continue
+        features["image_path"] = str(image_path)
+        rows.append(features)
+    append_log(log_path, rows)
+    print(f"✅ 成功分析 {len(rows)}/{len(files)} 张图片，结果已保存至 {log_path}")
+
 
 def main():
-    """主函数：分析静态图片"""
+    """主函数：分析静态图片（--batch 时批量分析整个目录）"""
+    parser = argparse.ArgumentParser(description="静态图片面部 AU 与情绪分析")
+    parser.add_argument("--batch", metavar="DIR", help="批量分析该目录下的全部图片")
+    parser.add_argument("--n-jobs", type=int, default=min(os.cpu_count() or 1, 4),
+                        help="批量模式的并行线程数")
+    args = parser.parse_args()
+
     # 设置要分析的图片路径
     project_root = Path(__file__).parent.parent.parent
+    log_dir = project_root / 'data' / 'logs'
+    log_dir.mkdir(parents=True, exist_ok=True)
+    log_path = log_dir / "static_face_log.csv"
+
+    if args.batch:
+        analyze_folder(args.batch, max(1, args.n_jobs), log_path)
+        return
+
     image_path = project_root / 'data' / 'input' / 'test.jpg'
 
     # 确保输入目录存在
@@ -49,35 +130,17 @@ def main():
     print(f"专注度: {features['focus_score']}")
     print(f"眨眼状态: {features['blink_status']}")
     print(f"AU4 皱眉: {features['au4_frown']}")
-    print(f"AU12 眉毛上扬: {features['au12_eyebrow_raise']}")
-    print(f"AU12 微笑: {features['au12_smile']}")
+    print(f"AU1 眉内侧上扬: {features['au1_inner_brow_raise']}")
+    print(f"AU12 微笑: {format_au(features['au12_smile'])}")
     print(f"AU9 皱鼻: {features['au9_nose_wrinkle']}")
-    print(f"AU15 嘴角下拉: {features['au15_mouth_down']}")
-    print(f"AU25 张嘴: {features['au25_mouth_open']}")
+    print(f"AU15 嘴角下拉: {format_au(features['au15_mouth_down'])}")
+    print(f"AU25 张嘴: {format_au(features['au25_mouth_open'])}")
     print(f"当前情绪: {features['emotion']}")
     print("=" * 60)
 
     # 保存到CSV
-    log_dir = project_root / 'data' / 'logs'
-    log_dir.mkdir(parents=True, exist_ok=True)
-    log_path = log_dir / "static_face_log.csv"
-
-    fieldnames = [
-        "timestamp", "image_path", "focus_score", "blink_status", "au4_frown", "au12_eyebrow_raise",
-        "au12_smile", "au9_nose_wrinkle", "au15_mouth_down", "au25_mouth_open", "eye_closed_sec", "emotion"
-    ]
-
-    # 如果是第一次运行，创建CSV文件并写入表头
-    if not log_path.exists():
-        with open(log_path, 'w', newline='', encoding='utf-8') as f:
-            writer = csv.DictWriter(f, fieldnames=fieldnames)
-            writer.writeheader()
-
-    # 写入本次分析结果
     features["image_path"] = str(image_path)
-    with open(log_path, 'a', newline='', encoding='utf-8') as f:
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        writer.writerow(features)
+    append_log(log_path, [features])
 
     print(f"✅ 结果已保存至 {log_path}")
 
@@ -1,8 +1,13 @@
 import cv2
+import numpy as np
 import time
 import csv
 import os
 import sys
+import argparse
+import queue
+import threading
+from operator import itemgetter
 from pathlib import Path
 
 project_root = Path(__file__).parent.parent.parent
@@ -14,8 +19,195 @@ except ImportError as e:
     print(f"❌ 导入失败: {e}")
     exit(1)
 
+# 字典类字段以紧凑 JSON 写入 CSV（可被下游直接 json.loads 解析）；orjson 可选，未安装时用标准库
+try:
+    import orjson
+
+    def _dumps(obj):
+        return orjson.dumps(obj).decode()
+except ImportError:
+    import json
+
+    def _dumps(obj):
+        return json.dumps(obj, ensure_ascii=False, separators=(',', ':'))
+
+
+# ✅ 完整字段列表（包含所有新增 AU + 视线追踪）
+KEY_FIELDS = [
+    "session_id", "timestamp", "focus_score", "symmetry_score",
+    "au1_inner_brow_raise", "au2_outer_brow_raise", "au4_frown",
+    "au6_cheek_raise", "au7_eye_squeeze", "au9_nose_wrinkle",
+    "au10_upper_lip_raise", "au12_smile", "au14_dimpler",
+    "au15_mouth_down", "au20_lip_stretcher", "au23_lip_compression",
+    "au25_mouth_open", "au26_jaw_drop", "head_yaw", "head_pitch",
+    "blink_rate_per_min", "eye_closed_sec",
+    "psychological_signals", "micro_expressions",
+    "emotion_vector", "dominant_emotion", "confidence", "tension_level",
+    # ✅ 新增：视线追踪字段
+    "left_iris_x", "left_iris_y", "right_iris_x", "right_iris_y",
+    "gaze_direction_x", "gaze_direction_y", "gaze_deviation"
+]
+
+# 按表头顺序一次取出整行（itemgetter 在 C 层完成），直接交给 csv.writer，省去 DictWriter 的逐字段查找
+row_values = itemgetter(*KEY_FIELDS)
+
+
+# 字典类字段（写入前序列化为 JSON）
+_JSON_FIELDS = ("psychological_signals", "micro_expressions", "emotion_vector")
+
+# 各列缺失时的默认值；session_id / timestamp / tension_level 在 build_log_row 中单独处理
+_ROW_DEFAULTS = dict.fromkeys(KEY_FIELDS, 0)
+_ROW_DEFAULTS.update(dict.fromkeys(_JSON_FIELDS, {}))
+_ROW_DEFAULTS.update({
+    "focus_score": 0.0,
+    "symmetry_score": 1.0,
+    "dominant_emotion": "unknown",
+    "confidence": 0.0,
+    "left_iris_x": 0.0, "left_iris_y": 0.0, "right_iris_x": 0.0, "right_iris_y": 0.0,
+    "gaze_direction_x": 0.0, "gaze_direction_y": 0.0, "gaze_deviation": 0.0,
+})
+
+
+def build_log_row(features, session_id):
+    """由单帧分析结果构建日志行（键与 KEY_FIELDS 一致）"""
+    # 全部使用 .get() 避免 KeyError
+    row = {k: features.get(k, _ROW_DEFAULTS[k]) for k in KEY_FIELDS}
+    row["session_id"] = features.get("session_id", session_id)
+    row["timestamp"] = features.get("timestamp", time.time())
+    row["tension_level"] = row["psychological_signals"].get("tension_level", "low")
+    for k in _JSON_FIELDS:
+        row[k] = _dumps(row[k])
+    return row
+
+# 文字图层每隔多少帧重新渲染一次，其余帧直接贴上缓存的图层
+OVERLAY_REFRESH_FRAMES = 5
+_OVERLAY_FONT = cv2.FONT_HERSHEY_SIMPLEX
+
+
+def render_text_overlay(lines, frame_shape, color=(0, 255, 255)):
+    """
+    将多行文字渲染到与帧左上角对齐的小图层上，返回 (预乘颜色图层, 反向透明度)
+
+    putText 为软件光栅化，逐帧绘制十几行文字开销可观；图层缓存后每帧只需一次
+    混合（blend_overlay），文字边缘的过渡像素也与直接绘制一致
+    """
+    height = min(frame_shape[0], 30 + len(lines) * 25)
+    width = min(frame_shape[1], 12 + max(cv2.getTextSize(line, _OVERLAY_FONT, 0.6, 2)[0][0] for line in lines))
+    alpha = np.zeros((height, width), dtype=np.uint8)
+    for i, line in enumerate(lines):
+        cv2.putText(alpha, line, (10, 30 + i * 25), _OVERLAY_FONT, 0.6, 255, 2)
+    alpha = cv2.merge([alpha] * 3)
+    layer = cv2.multiply(np.full_like(alpha, color), alpha, scale=1 / 255)
+    return layer, cv2.bitwise_not(alpha)
+
+
+def blend_overlay(frame, overlay):
+    """把缓存的文字图层混合到帧的左上角（原地修改）"""
+    layer, inv_alpha = overlay
+    roi = frame[:layer.shape[0], :layer.shape[1]]
+    cv2.multiply(roi, inv_alpha, dst=roi, scale=1 / 255)
+    cv2.add(roi, layer, dst=roi)
+
+
+def _load_drawing():
+    """导入 MediaPipe 绘图工具，返回 (drawing_utils, drawing_styles, face_mesh)；未安装时返回 None"""
+    try:
+        import mediapipe as mp
+        drawing = (mp.solutions.drawing_utils, mp.solutions.drawing_styles, mp.solutions.face_mesh)
+    except ImportError:
+        print("⚠️ MediaPipe 未安装")
+        return None
+    print("✓ MediaPipe 已加载")
+    return drawing
+
+
+# 实时模式下日志行交给后台线程写盘，采集循环不因 write/flush 的系统调用而阻塞
+LOG_QUEUE_SIZE = 256
+_LOG_STOP = object()
+
+
+def _csv_writer_loop(log_queue, log_path, flush_every):
+    """后台写日志：文件只打开一次，从队列取出整行写入，每 flush_every 行刷新一次，收到 _LOG_STOP 后退出"""
+    with open(log_path, 'w', newline='', encoding='utf-8', buffering=1 << 16) as log_file:
+        writer = csv.writer(log_file)
+        writer.writerow(KEY_FIELDS)
+        written = 0
+        while True:
+            row = log_queue.get()
+            if row is _LOG_STOP:
+                break
+            try:
+                writer.writerow(row)
+                written += 1
+                if written % flush_every == 0:
+                    log_file.flush()
+            except Exception as e:
+                print(f"⚠️ 写入日志失败: {e}")
+
+
+def enqueue_log_row(log_queue, row):
+    """非阻塞入队；队列已满（磁盘跟不上）时丢弃最旧的一行，保证采集循环不停顿"""
+    while True:
+        try:
+            log_queue.put_nowait(row)
+            return
+        except queue.Full:
+            try:
+                log_queue.get_nowait()
+            except queue.Empty:
+                pass
+
+
+def analyze_video_file(video_path, n_workers, log_dir):
+    """
+    离线分析视频文件：FaceMesh 推理在 n_workers 个线程中流水线并行，
+    特征分析按帧序执行，结果逐帧写入 CSV（不显示画面）
+    """
+    cap = cv2.VideoCapture(str(video_path))
+    # 保留小数帧率（如 29.97），否则离线时间戳 idx / fps 会随帧数累积漂移；需要整数帧数处由 VideoPipeline 自行取整
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    cap.release()
+
+    session_id = time.strftime("%Y%m%d_%H%M%S")
+    analyzer = FaceAUAnalyzer(fps=fps, session_id=session_id, shared_face_mesh=True)
+    log_path = log_dir / f"face_au_log_{session_id}.csv"
+
+    start_time = time.time()
+    frame_idx = -1
+    analyzed = 0
+    with open(log_path, 'w', newline='', encoding='utf-8', buffering=1 << 16) as log_file:
+        writer = csv.writer(log_file)
+        writer.writerow(KEY_FIELDS)
+        for frame_idx, result_obj, results, features in analyzer.process_video_file(video_path, n_workers=n_workers):
+            if result_obj is None:
+                continue
+            writer.writerow(row_values(build_log_row(features, session_id)))
+            analyzed += 1
+
+    elapsed = time.time() - start_time
+    print(f"📊 共处理 {frame_idx + 1} 帧（{analyzed} 帧检测到人脸），耗时 {elapsed:.1f}s")
+    print(f"📊 数据已保存至: {log_path}")
+
 
 def main():
+    parser = argparse.ArgumentParser(description="实时/离线视频面部 AU 与情绪分析")
+    parser.add_argument("--video", metavar="PATH", help="离线分析视频文件（不指定时使用摄像头实时分析）")
+    parser.add_argument("--n-workers", type=int, default=min(os.cpu_count() or 1, 4),
+                        help="离线模式下并行执行 FaceMesh 推理的线程数")
+    parser.add_argument("--no-draw", action="store_true", help="实时模式下不绘制人脸网格")
+    args = parser.parse_args()
+
+    project_root = Path(__file__).parent.parent.parent
+    log_dir = project_root / 'data' / 'logs'
+    log_dir.mkdir(parents=True, exist_ok=True)
+
+    if args.video:
+        try:
+            analyze_video_file(args.video, max(1, args.n_workers), log_dir)
+        except Exception as e:
+            print(f"❌ 视频分析失败: {e}")
+        return
+
     cap = cv2.VideoCapture(0)
     cap.set(cv2.CAP_PROP_FRAME_WIDTH, 1280)
     cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 720)
@@ -35,166 +227,110 @@ def main():
         print(f"❌ 分析器初始化失败: {e}")
         return
 
-    project_root = Path(__file__).parent.parent.parent
-    log_dir = project_root / 'data' / 'logs'
-    log_dir.mkdir(parents=True, exist_ok=True)
     log_path = log_dir / f"face_au_log_{session_id}.csv"
 
-    # ✅ 完整字段列表（包含所有新增 AU + 视线追踪）
-    KEY_FIELDS = [
-        "session_id", "timestamp", "focus_score", "symmetry_score",
-        "au1_inner_brow_raise", "au2_outer_brow_raise", "au4_frown",
-        "au6_cheek_raise", "au7_eye_squeeze", "au9_nose_wrinkle",
-        "au10_upper_lip_raise", "au12_smile", "au14_dimpler",
-        "au15_mouth_down", "au20_lip_stretcher", "au23_lip_compression",
-        "au25_mouth_open", "au26_jaw_drop", "head_yaw", "head_pitch",
-        "blink_rate_per_min", "eye_closed_sec",
-        "psychological_signals", "micro_expressions",
-        "emotion_vector", "dominant_emotion", "confidence", "tension_level",
-        # ✅ 新增：视线追踪字段
-        "left_iris_x", "left_iris_y", "right_iris_x", "right_iris_y",
-        "gaze_direction_x", "gaze_direction_y", "gaze_deviation"
-    ]
-
-    with open(log_path, 'w', newline='', encoding='utf-8') as f:
-        writer = csv.DictWriter(f, fieldnames=KEY_FIELDS)
-        writer.writeheader()
-
     print("按 'q' 退出。数据将记录最多 10 分钟...")
     start_time = time.time()
 
-    # 尝试导入 MediaPipe
+    # MediaPipe 绘图工具在第一次检测到人脸需要绘制时才导入；--no-draw 时完全不加载
     mp_drawing = mp_drawing_styles = mp_face_mesh = None
+    drawing_pending = not args.no_draw
+    overlay = None  # 缓存的 (预乘颜色图层, 反向透明度)
+    display_idx = 0
+
+    # 日志由后台线程写入（文件只打开一次，约每秒刷新一次缓冲区）
+    log_queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+    log_writer = threading.Thread(target=_csv_writer_loop, args=(log_queue, log_path, fps),
+                                  name="csv_writer", daemon=True)
+    log_writer.start()
+
     try:
-        import mediapipe as mp
-        mp_drawing = mp.solutions.drawing_utils
-        mp_drawing_styles = mp.solutions.drawing_styles
-        mp_face_mesh = mp.solutions.face_mesh
-        print("✓ MediaPipe 已加载")
-    except ImportError:
-        print("⚠️ MediaPipe 未安装")
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                break
 
-    while True:
-        ret, frame = cap.read()
-        if not ret:
-            break
-
-        frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        result_obj, results, features = analyzer.process_frame(frame_rgb)
-
-        annotated_frame = frame.copy()
-        if results and results.multi_face_landmarks and mp_drawing is not None:
-            for face_landmarks in results.multi_face_landmarks:
-                mp_drawing.draw_landmarks(
-                    image=annotated_frame,
-                    landmark_list=face_landmarks,
-                    connections=mp_face_mesh.FACEMESH_TESSELATION,
-                    landmark_drawing_spec=None,
-                    connection_drawing_spec=mp_drawing_styles.get_default_face_mesh_tesselation_style()
-                )
-                mp_drawing.draw_landmarks(
-                    image=annotated_frame,
-                    landmark_list=face_landmarks,
-                    connections=mp_face_mesh.FACEMESH_IRISES,
-                    landmark_drawing_spec=None,
-                    connection_drawing_spec=mp_drawing_styles.get_default_face_mesh_iris_connections_style()
-                )
-
-        # === 实时显示全部 AU 特征 ===
-        if features:
-            tension_info = features.get('psychological_signals', {})
-            tension_level = tension_info.get('tension_level', 'unknown')
-            dominant_emotion = features.get('dominant_emotion', 'unknown')
-            confidence = features.get('confidence', 0.0)
-            emotion_text = f"{dominant_emotion} ({confidence:.2f})"
-
-            lines = [
-                f"Emotion: {emotion_text}",
-                f"Tension: {tension_level.upper()}",
-                f"AU1: {features.get('au1_inner_brow_raise', 0):.2f}",
-                f"AU2: {features.get('au2_outer_brow_raise', 0):.2f}",
-                f"AU4: {features.get('au4_frown', 0):.2f}",
-                f"AU6: {features.get('au6_cheek_raise', 0):.2f}",
-                f"AU7: {features.get('au7_eye_squeeze', 0):.2f}",
-                f"AU9: {features.get('au9_nose_wrinkle', 0):.2f}",
-                f"AU10: {features.get('au10_upper_lip_raise', 0):.2f}",
-                f"AU12: {features.get('au12_smile', 0):.2f}",
-                f"AU14: {features.get('au14_dimpler', 0):.2f}",
-                f"AU15: {features.get('au15_mouth_down', 0):.2f}",
-                f"AU20: {features.get('au20_lip_stretcher', 0):.2f}",
-                f"AU23: {features.get('au23_lip_compression', 0):.2f}",
-                f"AU25: {features.get('au25_mouth_open', 0):.2f}",
-                f"AU26: {features.get('au26_jaw_drop', 0):.2f}"
-            ]
-            for i, line in enumerate(lines):
-                cv2.putText(annotated_frame, line, (10, 30 + i * 25),
-                            cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 255), 2)
-
-        cv2.imshow("Facial AU & Emotion Analyzer", annotated_frame)
-
-        # === 日志输出 ===
-        if features:
-            current_time_str = time.strftime('%H:%M:%S')
-            tension_info = features.get('psychological_signals', {})
-            tension_level = tension_info.get('tension_level', 'low')
-            dominant_emotion = features.get('dominant_emotion', 'unknown')
-            confidence = features.get('confidence', 0.0)
-
-            print(f"[{current_time_str}] 情绪: {dominant_emotion} "
-                  f"(置信度: {confidence:.2f}), "
-                  f"紧张度: {tension_level.upper()}")
-
-            # 构建日志行（全部使用 .get() 避免 KeyError）
-            row = {
-                "session_id": features.get("session_id", session_id),
-                "timestamp": features.get("timestamp", time.time()),
-                "focus_score": features.get("focus_score", 0.0),
-                "symmetry_score": features.get("symmetry_score", 1.0),
-                "au1_inner_brow_raise": features.get("au1_inner_brow_raise", 0),
-                "au2_outer_brow_raise": features.get("au2_outer_brow_raise", 0),
-                "au4_frown": features.get("au4_frown", 0),
-                "au6_cheek_raise": features.get("au6_cheek_raise", 0),
-                "au7_eye_squeeze": features.get("au7_eye_squeeze", 0),
-                "au9_nose_wrinkle": features.get("au9_nose_wrinkle", 0),
-                "au10_upper_lip_raise": features.get("au10_upper_lip_raise", 0),
-                "au12_smile": features.get("au12_smile", 0),
-                "au14_dimpler": features.get("au14_dimpler", 0),
-                "au15_mouth_down": features.get("au15_mouth_down", 0),
-                "au20_lip_stretcher": features.get("au20_lip_stretcher", 0),
-                "au23_lip_compression": features.get("au23_lip_compression", 0),
-                "au25_mouth_open": features.get("au25_mouth_open", 0),
-                "au26_jaw_drop": features.get("au26_jaw_drop", 0),
-                "head_yaw": features.get("head_yaw", 0),
-                "head_pitch": features.get("head_pitch", 0),
-                "blink_rate_per_min": features.get("blink_rate_per_min", 0),
-                "eye_closed_sec": features.get("eye_closed_sec", 0),
-                "psychological_signals": str(features.get("psychological_signals", {})),
-                "micro_expressions": str(features.get("micro_expressions", {})),
-                "emotion_vector": str(features.get("emotion_vector", {})),
-                "dominant_emotion": dominant_emotion,
-                "confidence": confidence,
-                "tension_level": tension_level,
-                # ✅ 新增：视线追踪字段
-                "left_iris_x": features.get("left_iris_x", 0.0),
-                "left_iris_y": features.get("left_iris_y", 0.0),
-                "right_iris_x": features.get("right_iris_x", 0.0),
-                "right_iris_y": features.get("right_iris_y", 0.0),
-                "gaze_direction_x": features.get("gaze_direction_x", 0.0),
-                "gaze_direction_y": features.get("gaze_direction_y", 0.0),
-                "gaze_deviation": features.get("gaze_deviation", 0.0)
-            }
-
-            # 安全写入 CSV
-            try:
-                with open(log_path, 'a', newline='', encoding='utf-8') as f:
-                    writer = csv.DictWriter(f, fieldnames=KEY_FIELDS)
-                    writer.writerow(row)
-            except Exception as e:
-                print(f"⚠️ 写入日志失败: {e}")
+            result_obj, results, features = analyzer.process_frame_bgr(frame)
+
+            # 分析已在 RGB 复用缓冲区上完成，原始帧之后只用于显示，直接在其上绘制，无需整帧复制
+            annotated_frame = frame
+            if drawing_pending and results and results.multi_face_landmarks:
+                drawing_pending = False
+                drawing = _load_drawing()
+                if drawing is not None:
+                    mp_drawing, mp_drawing_styles, mp_face_mesh = drawing
+            if results and results.multi_face_landmarks and mp_drawing is not None:
+                for face_landmarks in results.multi_face_landmarks:
+                    mp_drawing.draw_landmarks(
+                        image=annotated_frame,
+                        landmark_list=face_landmarks,
+                        connections=mp_face_mesh.FACEMESH_TESSELATION,
+                        landmark_drawing_spec=None,
+                        connection_drawing_spec=mp_drawing_styles.get_default_face_mesh_tesselation_style()
+                    )
+                    mp_drawing.draw_landmarks(
+                        image=annotated_frame,
+                        landmark_list=face_landmarks,
+                        connections=mp_face_mesh.FACEMESH_IRISES,
+                        landmark_drawing_spec=None,
+                        connection_drawing_spec=mp_drawing_styles.get_default_face_mesh_iris_connections_style()
+                    )
+
+            # === 实时显示全部 AU 特征（文字图层每 OVERLAY_REFRESH_FRAMES 帧刷新一次） ===
+            if features and (overlay is None or display_idx % OVERLAY_REFRESH_FRAMES == 0):
+                tension_info = features.get('psychological_signals', {})
+                tension_level = tension_info.get('tension_level', 'unknown')
+                dominant_emotion = features.get('dominant_emotion', 'unknown')
+                confidence = features.get('confidence', 0.0)
+                emotion_text = f"{dominant_emotion} ({confidence:.2f})"
+
+                lines = [
+                    f"Emotion: {emotion_text}",
+                    f"Tension: {tension_level.upper()}",
+                    f"AU1: {features.get('au1_inner_brow_raise', 0):.2f}",
+                    f"AU2: {features.get('au2_outer_brow_raise', 0):.2f}",
+                    f"AU4: {features.get('au4_frown', 0):.2f}",
+                    f"AU6: {features.get('au6_cheek_raise', 0):.2f}",
+                    f"AU7: {features.get('au7_eye_squeeze', 0):.2f}",
+                    f"AU9: {features.get('au9_nose_wrinkle', 0):.2f}",
+                    f"AU10: {features.get('au10_upper_lip_raise', 0):.2f}",
+                    f"AU12: {features.get('au12_smile', 0):.2f}",
+                    f"AU14: {features.get('au14_dimpler', 0):.2f}",
+                    f"AU15: {features.get('au15_mouth_down', 0):.2f}",
+                    f"AU20: {features.get('au20_lip_stretcher', 0):.2f}",
+                    f"AU23: {features.get('au23_lip_compression', 0):.2f}",
+                    f"AU25: {features.get('au25_mouth_open', 0):.2f}",
+                    f"AU26: {features.get('au26_jaw_drop', 0):.2f}"
+                ]
+                overlay = render_text_overlay(lines, annotated_frame.shape)
+            if overlay is not None:
+                blend_overlay(annotated_frame, overlay)
+            display_idx += 1
+
+            cv2.imshow("Facial AU & Emotion Analyzer", annotated_frame)
+
+            # === 日志输出 ===
+            if features:
+                current_time_str = time.strftime('%H:%M:%S')
+                tension_info = features.get('psychological_signals', {})
+                tension_level = tension_info.get('tension_level', 'low')
+                dominant_emotion = features.get('dominant_emotion', 'unknown')
+                confidence = features.get('confidence', 0.0)
+
+                print(f"[{current_time_str}] 情绪: {dominant_emotion} "
+                      f"(置信度: {confidence:.2f}), "
+                      f"紧张度: {tension_level.upper()}")
+
+                enqueue_log_row(log_queue, row_values(build_log_row(features, session_id)))
 
-        # 退出条件
-        if time.time() - start_time > 600 or cv2.waitKey(1) & 0xFF == ord('q'):
-            break
+            # 退出条件
+            if time.time() - start_time > 600 or cv2.waitKey(1) & 0xFF == ord('q'):
+                break
+    finally:
+        # 结束标记排在所有日志行之后，等待后台线程写完剩余行并关闭文件
+        if log_writer.is_alive():
+            log_queue.put(_LOG_STOP)
+            log_writer.join()
 
     cap.release()
     cv2.destroyAllWindows()
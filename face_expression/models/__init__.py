@@ -1,2 +1,2 @@
-from .features import AUFeatures, TemporalStats, MicroExpressionResult
-from .results import EmotionResult, TensionResult, AnalysisFrameResult
\ No newline at end of file
+from .features import AUFeatures, TemporalStats, MicroExpressionResult, AU_NUMERIC_FIELDS, AU_NUMERIC_INDEX, MOUTH_BASELINE_FIELDS, get_au_vector
+from .results import EmotionResult, TensionSources, TensionResult, AnalysisFrameResult
\ No newline at end of file
@@ -1,7 +1,16 @@
+import sys
 from dataclasses import dataclass
+from operator import attrgetter
 from typing import List, Optional, Dict
 
-@dataclass
+import numpy as np
+
+# AUFeatures 每帧创建并被多处读取：Python 3.10+ 使用 __slots__，
+# 省去实例 __dict__，属性读取走描述符而不是字典哈希
+_SLOTS = {'slots': True} if sys.version_info >= (3, 10) else {}
+
+
+@dataclass(**_SLOTS)
 class AUFeatures:
     # 眉部
     au1_inner_brow_raise: float = 0.0
@@ -49,6 +58,26 @@ class AUFeatures:
     landmarks: Optional[List[float]] = None
 
 
+# AUFeatures 中的数值字段（不含原始 landmarks），按字段定义顺序
+AU_NUMERIC_FIELDS = tuple(
+    name for name, field in AUFeatures.__dataclass_fields__.items() if field.type in (float, bool)
+)
+# 相对嘴部静息基线计算的 AU：需要同一人的连续帧完成标定，单张静态图片没有基线，
+# 这些字段无法测量（静态结果中输出为 None，依赖它们的情绪规则不参与推理）
+MOUTH_BASELINE_FIELDS = (
+    'au10_upper_lip_raise', 'au12_smile', 'au15_mouth_down', 'au20_lip_stretcher',
+    'au23_lip_compression', 'au25_mouth_open', 'au26_jaw_drop',
+)
+# 字段名 → AU 向量下标（各分析引擎 *_from_array 接口共用的索引约定）
+AU_NUMERIC_INDEX = {name: i for i, name in enumerate(AU_NUMERIC_FIELDS)}
+_get_au_numeric = attrgetter(*AU_NUMERIC_FIELDS)
+
+
+def get_au_vector(au_features: AUFeatures) -> np.ndarray:
+    """按 AU_NUMERIC_FIELDS 顺序打包为 float64 向量"""
+    return np.array(_get_au_numeric(au_features), dtype=np.float64)
+
+
 @dataclass
 class TemporalStats:
     data: Dict[str, float]  # ✅ 字段名为 data
@@ -1,6 +1,9 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, asdict
 from typing import Dict, List
-from .features import AUFeatures, TemporalStats, MicroExpressionResult
+
+import numpy as np
+
+from .features import AUFeatures, TemporalStats, MicroExpressionResult, AU_NUMERIC_FIELDS, get_au_vector, _SLOTS
 
 @dataclass
 class EmotionResult:
@@ -10,11 +13,30 @@ class EmotionResult:
     composite_emotions: List[str]
     psychological_summary: str
 
+@dataclass(**_SLOTS)
+class TensionSources:
+    """紧张度各来源的贡献（固定字段，每帧创建一次，不再构造字典）"""
+    brow_furrow: float
+    lip_compression: float
+    eye_closure: float
+    expression_instability: float
+    emotional_influence: float
+
+    def to_dict(self):
+        return asdict(self)
+
 @dataclass
 class TensionResult:
     tension_score: float
     tension_level: str
-    tension_sources: Dict[str, float]
+    tension_sources: TensionSources
+
+    def to_dict(self):
+        return {
+            "tension_score": self.tension_score,
+            "tension_level": self.tension_level,
+            "tension_sources": self.tension_sources.to_dict()
+        }
 
 @dataclass
 class AnalysisFrameResult:
@@ -27,14 +49,24 @@ class AnalysisFrameResult:
     emotion_result: EmotionResult
     tension_result: TensionResult
 
-    def to_dict(self):
+    def to_dict(self, round_outputs=True):
+        """
+        参数:
+            round_outputs: 为 True 时 AU 特征统一保留 3 位小数（整组向量一次取整）；
+                程序化消费方可传 False 直接拿到原始精度
+        """
+        au_values = get_au_vector(self.au_features)
+        if round_outputs:
+            au_values = np.round(au_values, 3)
+        au_dict = dict(zip(AU_NUMERIC_FIELDS, au_values.tolist()))
+        au_dict["landmarks"] = self.au_features.landmarks
         return {
             "session_id": self.session_id,
             "timestamp": self.timestamp,
             "focus_score": self.focus_score,
             "symmetry_score": self.au_features.symmetry_score,
-            **{k: round(float(v), 3) for k, v in self.au_features.__dict__.items()},
-            "psychological_signals": self.tension_result.__dict__,
+            **au_dict,
+            "psychological_signals": self.tension_result.to_dict(),
             "micro_expressions": self.micro_expressions.data,
             "temporal_stats": self.temporal_stats.data,
             "emotion_vector": self.emotion_result.emotion_vector,
@@ -1,2 +1,3 @@
 from .video_pipeline import VideoPipeline
-from .image_pipeline import ImagePipeline
\ No newline at end of file
+from .image_pipeline import ImagePipeline
+from .face_mesh_pool import FaceMeshPool, get_shared_face_mesh_pool
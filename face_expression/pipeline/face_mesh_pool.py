@@ -0,0 +1,113 @@
+import queue
+import threading
+from contextlib import contextmanager, ExitStack
+
+import numpy as np
+
+# 共享池默认上限：同时进行推理的会话数超过该值时排队等待
+DEFAULT_POOL_SIZE = 4
+
+
+class FaceMeshPool:
+    """
+    跨会话共享的 FaceMesh 图对象池
+
+    FaceMesh 构造时会加载 TFLite 模型并完成推理后端预热，代价较高；
+    多个会话只需要各自的眨眼/历史等分析状态，模型本身可以共享。
+    池中的图对象按需创建（不超过 max_size 个），用完归还；
+    共享池使用 static_image_mode=True，逐帧独立检测，不携带跨帧跟踪状态。
+    """
+
+    def __init__(self, max_size=DEFAULT_POOL_SIZE, **options):
+        self.max_size = max_size
+        self._options = options
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    def _create(self):
+        import mediapipe as mp
+        return mp.solutions.face_mesh.FaceMesh(**self._options)
+
+    @contextmanager
+    def acquire(self):
+        """取出一个空闲的 FaceMesh，池未满时新建，否则阻塞等待其他会话归还"""
+        try:
+            mesh = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                can_create = self._created < self.max_size
+                if can_create:
+                    self._created += 1
+            if can_create:
+                try:
+                    mesh = self._create()
+                except Exception:
+                    with self._lock:
+                        self._created -= 1
+                    raise
+            else:
+                mesh = self._idle.get()
+        try:
+            yield mesh
+        finally:
+            self._idle.put(mesh)
+
+    def process(self, image_rgb):
+        with self.acquire() as mesh:
+            return mesh.process(image_rgb)
+
+    def warm_up(self, count=None, size=256):
+        """
+        预先创建最多 count 个图对象（默认填满池），并各自对空白图像推理一次
+
+        首次推理会加载 TFLite 模型并初始化推理后端，耗时可达秒级；
+        服务启动时预热，避免把这部分开销留给第一批请求
+        """
+        count = self.max_size if count is None else min(count, self.max_size)
+        dummy = np.zeros((size, size, 3), dtype=np.uint8)
+        # 同时持有 count 个图对象，迫使池逐个新建而不是反复取同一个
+        with ExitStack() as stack:
+            for _ in range(count):
+                stack.enter_context(self.acquire()).process(dummy)
+
+    def close(self):
+        """关闭当前空闲的全部图对象"""
+        while True:
+            try:
+                mesh = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            mesh.close()
+            with self._lock:
+                self._created -= 1
+
+
+_shared_pool = None
+_shared_pool_lock = threading.Lock()
+
+
+def get_shared_face_mesh_pool(max_size=None):
+    """
+    进程内共享的 FaceMesh 池（首次调用时创建）
+
+    参数:
+        max_size: 池上限，应不小于并发调用推理的工作线程数（如 API 的分析线程池 max_workers）；
+            共享池已存在时只会调大上限，不会被较小的值缩小，以免其他调用方的线程排队等待
+    """
+    global _shared_pool
+    if _shared_pool is None:
+        with _shared_pool_lock:
+            if _shared_pool is None:
+                _shared_pool = FaceMeshPool(
+                    max_size=max_size or DEFAULT_POOL_SIZE,
+                    static_image_mode=True,
+                    max_num_faces=1,
+                    refine_landmarks=True,
+                    min_detection_confidence=0.8
+                )
+                return _shared_pool
+    if max_size is not None:
+        with _shared_pool._lock:
+            _shared_pool.max_size = max(_shared_pool.max_size, max_size)
+    return _shared_pool
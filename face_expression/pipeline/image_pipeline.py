@@ -1,20 +1,116 @@
+import cv2
+import numpy as np
+
 from ..core.feature_extraction.au_calculator import AUFeatureCalculator
 from ..core.analysis.emotion_engine import EmotionEngine
 from ..core.analysis.tension_engine import TensionEngine
-from ..models.features import TemporalStats, MicroExpressionResult
+from ..models.features import TemporalStats, MicroExpressionResult, AU_NUMERIC_FIELDS, MOUTH_BASELINE_FIELDS, get_au_vector
+from .face_mesh_pool import get_shared_face_mesh_pool
+from .landmark_utils import landmarks_to_array, estimate_face_size
 
 class ImagePipeline:
-    def __init__(self):
+    def __init__(self, max_input_size=640):
+        """
+        参数:
+            max_input_size: 送入 FaceMesh 前图片长边的上限（像素），超出时按比例缩小；
+                关键点为归一化坐标，缩放不影响后续特征。None 表示不缩放
+        """
         self.feature_calculator = AUFeatureCalculator()
         self.emotion_engine = EmotionEngine()
         self.tension_engine = TensionEngine()
+        self.EAR_THRESHOLD = 0.21
+        self.max_input_size = max_input_size
+        self._rgb_buf = None  # BGR→RGB 转换的复用目标缓冲区（同尺寸图片之间复用）
 
     def process_image(self, landmarks_norm, face_width, face_height):
         au_features = self.feature_calculator.calculate(landmarks_norm, face_width, face_height)
-        emotion_result = self.emotion_engine.infer(au_features)
+        return self._analyze_features(au_features)
+
+    def _analyze_features(self, au_features, mouth_baseline=True):
+        emotion_result = self.emotion_engine.infer(au_features, mouth_baseline=mouth_baseline)
         tension_result = self.tension_engine.compute(au_features, TemporalStats({}))
         return {
             "au_features": au_features,
             "emotion_result": emotion_result,
             "tension_result": tension_result
-        }
\ No newline at end of file
+        }
+
+    def analyze_image(self, image_path):
+        """
+        读取图片文件并完成人脸检测与 AU/情绪分析
+
+        返回:
+            扁平的结果字典；图片无法读取或未检测到人脸时返回 None
+        """
+        image_bgr = cv2.imread(str(image_path))
+        if image_bgr is None:
+            return None
+        return self.analyze_bgr(image_bgr)
+
+    def analyze_bgr(self, image_bgr):
+        """分析已解码的 BGR 图像（OpenCV 格式），返回值同 analyze_image"""
+        # FaceMesh 内部只在 192/256 分辨率上推理，大图先用 INTER_AREA 缩小，省去后续转换与内部缩放的开销
+        long_edge = max(image_bgr.shape[:2])
+        if self.max_input_size and long_edge > self.max_input_size:
+            scale = self.max_input_size / long_edge
+            image_bgr = cv2.resize(image_bgr, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        if self._rgb_buf is None or self._rgb_buf.shape != image_bgr.shape:
+            self._rgb_buf = np.empty_like(image_bgr)
+        image_rgb = cv2.cvtColor(image_bgr, cv2.COLOR_BGR2RGB, dst=self._rgb_buf)
+        # 静态图片逐张独立检测，直接使用共享的 static_image_mode FaceMesh 池
+        results = get_shared_face_mesh_pool().process(image_rgb)
+        if not results.multi_face_landmarks:
+            return None
+
+        # 关键点一次性转为 (N, 2) 数组，后续距离计算全部在该数组上向量化完成
+        landmarks_norm = landmarks_to_array(results.multi_face_landmarks[0].landmark)
+        face_width, face_height = estimate_face_size(landmarks_norm)
+        # 按单元素批次计算：每张图片独立处理，不受之前分析过的图片影响
+        au_features, = self.feature_calculator.calculate_batch(
+            landmarks_norm[np.newaxis], [face_width], [face_height])
+        return self._to_flat_dict(self._analyze_features(au_features, mouth_baseline=False))
+
+    def _to_flat_dict(self, analysis):
+        au_features = analysis["au_features"]
+        emotion_result = analysis["emotion_result"]
+        tension_result = analysis["tension_result"]
+
+        features = dict(zip(AU_NUMERIC_FIELDS, np.round(get_au_vector(au_features), 3).tolist()))
+        # 单张图片没有嘴部静息基线，相对基线的嘴部 AU 无法测量，输出 None 而不是 0
+        features.update(dict.fromkeys(MOUTH_BASELINE_FIELDS))
+        features.update({
+            "focus_score": self._calculate_focus_score(au_features),
+            "blink_status": "closed" if au_features.avg_ear < self.EAR_THRESHOLD else "open",
+            "emotion": emotion_result.dominant_emotion,
+            "confidence": emotion_result.confidence,
+            "emotion_vector": emotion_result.emotion_vector,
+            "tension_score": tension_result.tension_score,
+            "tension_level": tension_result.tension_level,
+        })
+        return features
+
+    @staticmethod
+    def _calculate_focus_score(au_features):
+        # 单张图片没有眨眼频率，仅按头部偏转估计
+        yaw = abs(au_features.head_yaw)
+        if yaw < 0.03:
+            return 0.8
+        elif yaw > 0.08:
+            return 0.3
+        return 0.5
+
+    def process_images(self, landmarks_batch, face_widths, face_heights):
+        """
+        批量处理多张图像：AU 特征一次向量化计算，情绪与紧张度逐张推理
+
+        参数:
+            landmarks_batch: (B, N, 2) 归一化关键点（各图像的 MediaPipe 检测结果堆叠）
+            face_widths, face_heights: (B,)
+        返回:
+            与 process_image 结构相同的结果字典列表；各图像没有嘴部静息基线，
+            MOUTH_BASELINE_FIELDS 恒为 0，情绪推理不使用依赖它们的规则
+        """
+        return [
+            self._analyze_features(au_features, mouth_baseline=False)
+            for au_features in self.feature_calculator.calculate_batch(landmarks_batch, face_widths, face_heights)
+        ]
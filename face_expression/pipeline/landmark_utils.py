@@ -0,0 +1,32 @@
+import itertools
+import math
+from operator import attrgetter
+
+import numpy as np
+
+# 鼻尖、下巴、左右脸颊：用于估计脸高与脸宽
+_FACE_SIZE_IDX = np.array([1, 152, 234, 455], dtype=np.int32)
+
+_get_xy = attrgetter('x', 'y')
+
+
+def landmarks_to_array(landmarks):
+    """
+    将 MediaPipe 的 landmark 容器一次性转换为连续的 (N, 2) float32 数组
+
+    map + attrgetter 在 C 层遍历 protobuf 容器，避免逐点的 Python 生成器开销
+    """
+    return np.fromiter(
+        itertools.chain.from_iterable(map(_get_xy, landmarks)), dtype=np.float32, count=2 * len(landmarks)
+    ).reshape(-1, 2)
+
+
+def estimate_face_size(landmarks_norm):
+    """由鼻尖-下巴、左右脸颊距离估计 (face_width, face_height)，退化时返回 (1.0, 1.0)"""
+    (nose_x, nose_y), (chin_x, chin_y), (cheek_l_x, cheek_l_y), (cheek_r_x, cheek_r_y) = \
+        landmarks_norm[_FACE_SIZE_IDX].tolist()
+    face_height = math.hypot(nose_x - chin_x, nose_y - chin_y)
+    face_width = math.hypot(cheek_l_x - cheek_r_x, cheek_l_y - cheek_r_y)
+    if face_height < 1e-5 or face_width < 1e-5:
+        return 1.0, 1.0
+    return face_width, face_height
@@ -1,30 +1,92 @@
 import time
+import dataclasses
 import collections
+from concurrent.futures import ThreadPoolExecutor
+import cv2
 import numpy as np
-from scipy.spatial import distance as dist
 
 from ..core.feature_extraction.au_calculator import AUFeatureCalculator
 from ..core.analysis.micro_expression import MicroExpressionDetector
 from ..core.analysis.tension_engine import TensionEngine
 from ..core.analysis.emotion_engine import EmotionEngine
-from ..models.features import TemporalStats
+from ..models.features import TemporalStats, AU_NUMERIC_FIELDS as _AU_NAMES, get_au_vector
 from ..models.results import AnalysisFrameResult
+from .face_mesh_pool import get_shared_face_mesh_pool
+from .landmark_utils import landmarks_to_array, estimate_face_size
+
 
 class VideoPipeline:
-    def __init__(self, fps=30, session_id="default", save_landmarks=False):
+    # 下游（情绪/紧张度引擎）实际读取的时间序列统计：默认只为这些 AU 计算这些统计量
+    TEMPORAL_AUS = ('au1_inner_brow_raise', 'au4_frown', 'au12_smile')
+    TEMPORAL_STATS = ('trend', 'volatility')
+
+    def __init__(self, fps=30, session_id="default", save_landmarks=False, async_inference=False,
+                 include_all_temporal=False, shared_face_mesh=False, round_outputs=True,
+                 motion_gate_eps=0.0, max_input_size=640):
+        """
+        参数:
+            async_inference: 为 True 时 FaceMesh 推理在独立工作线程中执行，
+                process_frame 提交当前帧后对上一帧的推理结果做特征分析，
+                推理与后处理重叠执行，代价是输出结果滞后一帧
+            include_all_temporal: 诊断模式，为 True 时对所有 AU 输出
+                trend / volatility / change_rate；默认只计算 TEMPORAL_AUS × TEMPORAL_STATS
+            shared_face_mesh: 为 True 时从进程内共享的 FaceMesh 池取图对象推理，
+                多会话不再各自加载模型；共享池逐帧独立检测（static_image_mode），
+                眨眼与时间序列等会话状态仍保存在本实例中
+            round_outputs: 为 False 时跳过时间序列统计与 AU 输出字典的逐项取整
+            motion_gate_eps: 运动门限（归一化坐标）。大于 0 时，若所有关键点相对上次
+                计算 AU 的帧位移都小于该值，则复用上次的 AU 特征，只更新眨眼状态、
+                时间序列与后续推理；0 表示关闭（每帧都重新计算，默认）
+            max_input_size: 送入 FaceMesh 前帧长边的上限（像素），超出时按比例缩小；
+                关键点为归一化坐标，缩放不影响后续特征。None 表示不缩放
+        """
         self.fps = fps
         self.session_id = session_id
-        self.blink_times = []  # 记录眨眼时间戳
+        self.blink_times = collections.deque()  # 过去 1 分钟内的眨眼时间戳（按时间递增）
         self.eye_closed_duration = 0
         self.last_blink_time = 0
         self.EAR_THRESHOLD = 0.21
+        self._frame_interval = 1 / fps
 
         self._face_mesh = None
+        self.shared_face_mesh = shared_face_mesh
+        self.round_outputs = round_outputs
+        self._rgb_buf = None  # BGR→RGB 转换的复用目标缓冲区
+        self.max_input_size = max_input_size
+        self._resize_buf = None  # 缩小后帧的复用缓冲区
+        self.async_inference = async_inference
+        self._inference_executor = None  # 单工作线程，FaceMesh 只在该线程中访问
+        self._pending_inference = None   # 上一帧尚未取回的推理任务
         self.feature_calculator = AUFeatureCalculator(save_landmarks=save_landmarks)
+        self.motion_gate_eps = motion_gate_eps
+        self._last_pts = None  # 上次实际计算 AU 时的关键点
+        self._last_au = None
         self.micro_detector = MicroExpressionDetector(fps=fps)
         self.tension_engine = TensionEngine()
         self.emotion_engine = EmotionEngine()
-        self.au_history = collections.deque(maxlen=int(3 * fps))
+        # AU 历史：(窗口长度, 字段数) 的 float32 环形缓冲区（SoA 布局），每行一帧
+        self._hist = np.zeros((int(3 * fps), len(_AU_NAMES)), dtype=np.float32)
+        self.include_all_temporal = include_all_temporal
+        if include_all_temporal:
+            self._temporal_names = _AU_NAMES
+            self._temporal_stats = ('trend', 'volatility', 'change_rate')
+        else:
+            self._temporal_names = tuple(name for name in _AU_NAMES if name in self.TEMPORAL_AUS)
+            self._temporal_stats = self.TEMPORAL_STATS
+        # 历史缓冲区保存全部 AU，统计时只取这些列
+        self._temporal_cols = np.array([_AU_NAMES.index(name) for name in self._temporal_names], dtype=np.int32)
+        # 统计量按 trend → volatility → change_rate 的固定顺序计算；输出键名只在此处生成一次，
+        # 顺序与 (AU, 统计量) 的行优先展开一致
+        self._temporal_stats = tuple(
+            stat for stat in ('trend', 'volatility', 'change_rate') if stat in self._temporal_stats)
+        self._temporal_keys = tuple(
+            f'{au_name}_{stat_name}' for au_name in self._temporal_names for stat_name in self._temporal_stats)
+        self._hist_idx = 0  # 下一帧写入的行
+        self._hist_n = 0    # 已写入的有效行数
+        # 统计列的滑动累加量 Σy、Σy²、Σt·y（float64，每行一种）；t 为帧在窗口中的时间下标，
+        # 最早一帧的下标为 _t_oldest。趋势与波动由累加量 O(1) 得出，无需每帧遍历整个窗口
+        self._sums = np.zeros((3, len(self._temporal_cols)), dtype=np.float64)
+        self._t_oldest = 0
 
     @property
     def face_mesh(self):
@@ -39,30 +101,127 @@ class VideoPipeline:
             )
         return self._face_mesh
 
+    def process_frame_bgr(self, image_bgr):
+        """
+        处理 OpenCV 采集的 BGR 帧
+
+        BGR→RGB 转换写入按分辨率复用的连续缓冲区，避免每帧分配新图像；
+        调用方应直接传入摄像头读取到的 BGR ndarray。
+        大帧先缩小再转换，转换与推理都只处理缩小后的像素。
+        """
+        image_bgr = self._downscale(image_bgr)
+        if self._rgb_buf is None or self._rgb_buf.shape != image_bgr.shape:
+            self._rgb_buf = np.empty_like(image_bgr)
+        cv2.cvtColor(image_bgr, cv2.COLOR_BGR2RGB, dst=self._rgb_buf)
+        return self.process_frame(self._rgb_buf)
+
+    def _scaled_size(self, shape):
+        """长边超过 max_input_size 时返回缩小后的 (宽, 高)，否则返回 None"""
+        height, width = shape[:2]
+        long_edge = max(height, width)
+        if not self.max_input_size or long_edge <= self.max_input_size:
+            return None
+        scale = self.max_input_size / long_edge
+        return max(1, round(width * scale)), max(1, round(height * scale))
+
+    def _downscale(self, image):
+        """按 max_input_size 用 INTER_AREA 缩小到复用缓冲区；无需缩小时原样返回"""
+        size = self._scaled_size(image.shape)
+        if size is None:
+            return image
+        shape = (size[1], size[0]) + image.shape[2:]
+        if self._resize_buf is None or self._resize_buf.shape != shape:
+            self._resize_buf = np.empty(shape, dtype=image.dtype)
+        return cv2.resize(image, size, dst=self._resize_buf, interpolation=cv2.INTER_AREA)
+
     def process_frame(self, image_rgb):
-        results = self.face_mesh.process(image_rgb)
-        h, w = image_rgb.shape[:2]
+        image_rgb = self._downscale(image_rgb)
+        if self.async_inference:
+            return self._process_frame_async(image_rgb)
+        return self._analyze(self._run_face_mesh(image_rgb))
+
+    def _process_frame_async(self, image_rgb):
+        """提交当前帧推理，同时分析上一帧的结果（首帧返回空结果）"""
+        if self._inference_executor is None:
+            self._inference_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="face_mesh")
+        previous = self._pending_inference
+        # 复制一份帧数据，避免调用方复用缓冲区时覆盖尚在推理中的图像
+        self._pending_inference = self._inference_executor.submit(self._run_face_mesh, image_rgb.copy())
+        if previous is None:
+            return None, None, {"emotion": "pending"}
+        return self._analyze(previous.result())
+
+    def _run_face_mesh(self, image_rgb):
+        if self.shared_face_mesh:
+            return get_shared_face_mesh_pool().process(image_rgb)
+        return self.face_mesh.process(image_rgb)
+
+    def close(self):
+        """释放推理线程与 FaceMesh 资源"""
+        if self._inference_executor is not None:
+            self._inference_executor.shutdown(wait=True)
+            self._inference_executor = None
+            self._pending_inference = None
+        if self._face_mesh is not None:
+            self._face_mesh.close()
+            self._face_mesh = None
+
+    def process_video_file(self, video_path, n_workers=4, max_pending=16):
+        """
+        离线分析视频文件，按帧序逐帧产出 (frame_idx, result, results, features)
 
+        解码与特征分析在调用线程中按顺序执行（眨眼、时间序列等状态依赖帧序），
+        FaceMesh 推理提交到 n_workers 个线程，使用共享池中的 static_image_mode 图对象并行执行；
+        最多 max_pending 帧处于推理中。时间戳取视频时间（帧号 × 帧间隔），
+        因此应以视频的实际帧率创建本实例。
+        """
+        cap = cv2.VideoCapture(str(video_path))
+        if not cap.isOpened():
+            raise ValueError(f"无法打开视频文件: {video_path}")
+
+        pool = get_shared_face_mesh_pool(max_size=n_workers)
+        pending = collections.deque()  # (帧号, 推理任务)，按提交顺序即帧序
+        try:
+            with ThreadPoolExecutor(max_workers=n_workers, thread_name_prefix="face_mesh") as executor:
+                frame_idx = 0
+                while True:
+                    ok, frame = cap.read()
+                    if ok:
+                        # 每帧在推理完成前都需保持独立：缩小（如需要）与 cvtColor 都分配新图像
+                        size = self._scaled_size(frame.shape)
+                        if size is not None:
+                            frame = cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+                        image_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+                        pending.append((frame_idx, executor.submit(pool.process, image_rgb)))
+                        frame_idx += 1
+                    while pending and (not ok or len(pending) >= max_pending):
+                        idx, future = pending.popleft()
+                        yield (idx, *self._analyze(future.result(), timestamp=idx * self._frame_interval))
+                    if not ok:
+                        break
+        finally:
+            cap.release()
+
+    def _analyze(self, results, timestamp=None):
+        """timestamp: 帧时间（秒），默认取当前时间（实时采集）"""
         if not results.multi_face_landmarks:
             return None, None, {"emotion": "no_face"}
 
-        lm = results.multi_face_landmarks[0].landmark
-        landmarks_norm = [(pt.x, pt.y) for pt in lm]
-
-        nose_tip = np.array(landmarks_norm[1])
-        chin = np.array(landmarks_norm[152])
-        cheek_left = np.array(landmarks_norm[234])
-        cheek_right = np.array(landmarks_norm[455])
-        face_height = dist.euclidean(nose_tip, chin)
-        face_width = dist.euclidean(cheek_left, cheek_right)
-        if face_height < 1e-5 or face_width < 1e-5:
-            face_height = face_width = 1.0
+        landmarks_norm = landmarks_to_array(results.multi_face_landmarks[0].landmark)
+        face_width, face_height = estimate_face_size(landmarks_norm)
 
-        current_au = self.feature_calculator.calculate(landmarks_norm, face_width, face_height)
+        if self._landmarks_still(landmarks_norm):
+            # 复制一份，下面写入的眨眼字段不影响缓存
+            current_au = dataclasses.replace(self._last_au)
+        else:
+            current_au = self.feature_calculator.calculate(landmarks_norm, face_width, face_height)
+            if self.motion_gate_eps > 0:
+                self._last_pts = landmarks_norm
+                self._last_au = current_au
 
         # === 优化眨眼检测 ===
         ear = current_au.avg_ear
-        current_time = time.time()
+        current_time = time.time() if timestamp is None else timestamp
         is_blink = ear < self.EAR_THRESHOLD
         current_au.is_blink = is_blink
 
@@ -70,36 +229,50 @@ class VideoPipeline:
             self.blink_times.append(current_time)
             self.last_blink_time = current_time
 
-        # 计算过去 1 分钟内的眨眼次数
+        # 过去 1 分钟内的眨眼次数：淘汰过期时间戳后即为队列长度
         one_minute_ago = current_time - 60
-        blink_count = sum(1 for t in self.blink_times if t > one_minute_ago)
-        current_au.blink_rate_per_min = blink_count
+        while self.blink_times and self.blink_times[0] <= one_minute_ago:
+            self.blink_times.popleft()
+        current_au.blink_rate_per_min = len(self.blink_times)
 
         if ear < 0.18:
-            self.eye_closed_duration += 1 / self.fps
+            self.eye_closed_duration += self._frame_interval
         else:
             self.eye_closed_duration = 0
         current_au.eye_closed_sec = self.eye_closed_duration
 
         # === 时间序列统计 ===
-        self.au_history.append(current_au)
+        current_vec = get_au_vector(current_au)
+        self._append_history(current_vec)
+        current_row = self._hist[self._hist_idx - 1]
+
         temporal_stats_dict = {}
-        for field in current_au.__dataclass_fields__:
-            au_name = field
-            series = [getattr(frame, au_name) for frame in self.au_history]
-            if len(series) >= 2:
-                trend = np.polyfit(range(len(series)), series, 1)[0]
-                volatility = np.std(series)
-                change_rate = current_au.__getattribute__(au_name) - series[-1]
-                temporal_stats_dict[f'{au_name}_trend'] = round(float(trend), 3)
-                temporal_stats_dict[f'{au_name}_volatility'] = round(float(volatility), 3)
-                temporal_stats_dict[f'{au_name}_change_rate'] = round(float(change_rate), 3)
+        n = self._hist_n
+        if n >= 2:
+            sum_y, sum_yy, sum_ty = self._sums
+            mean = sum_y / n
+            # (AU 数, 统计量数) 的结果矩阵，每列一种统计量
+            stats = np.empty((len(self._temporal_cols), len(self._temporal_stats)), dtype=np.float64)
+            for j, stat_name in enumerate(self._temporal_stats):
+                if stat_name == 'trend':
+                    # 最小二乘斜率（等价于 np.polyfit 一次项）：Σ(t - t̄)·y / Σ(t - t̄)²
+                    t_mean = self._t_oldest + (n - 1) / 2
+                    stats[:, j] = (sum_ty - t_mean * sum_y) / (n * (n * n - 1) / 12)
+                elif stat_name == 'volatility':
+                    # 总体标准差；舍入误差可能使方差略小于 0，截断到 0
+                    stats[:, j] = np.sqrt(np.maximum(sum_yy / n - mean * mean, 0.0))
+                else:
+                    # 上一帧在环形缓冲区中位于当前行之前一行（负下标自动回绕，n >= 2 保证有效）
+                    previous_row = self._hist[self._hist_idx - 2, self._temporal_cols]
+                    stats[:, j] = current_row[self._temporal_cols] - previous_row
+            # 整个矩阵一次取整、一次转为 Python float，与预先生成的键名配对
+            if self.round_outputs:
+                np.round(stats, 3, out=stats)
+            temporal_stats_dict = dict(zip(self._temporal_keys, stats.ravel().tolist()))
 
         temporal_stats = TemporalStats(data=temporal_stats_dict)
 
-        micro_exps = self.micro_detector.detect(current_au)
-        emotion_result = self.emotion_engine.infer(current_au, temporal_stats, micro_exps)
-        tension_result = self.tension_engine.compute(current_au, temporal_stats, emotion_result.emotion_vector)
+        micro_exps, emotion_result, tension_result = self._infer_expression(current_vec, temporal_stats, current_au)
 
         focus_score = self._calculate_focus_score(current_au)
 
@@ -114,13 +287,58 @@ class VideoPipeline:
             tension_result=tension_result
         )
 
-        return result, results, result.to_dict()
+        return result, results, result.to_dict(round_outputs=self.round_outputs)
+
+    def _append_history(self, au_vec):
+        """写入一帧 AU 向量并滑动更新统计列的累加量"""
+        maxlen = len(self._hist)
+        cols = self._temporal_cols
+        row = self._hist[self._hist_idx]
+        if self._hist_n == maxlen:
+            # 淘汰最早一帧（即将被覆盖的行）
+            old = row[cols].astype(np.float64)
+            self._sums[0] -= old
+            self._sums[1] -= old * old
+            self._sums[2] -= self._t_oldest * old
+            self._t_oldest += 1
+        row[:] = au_vec
+        self._hist_idx = (self._hist_idx + 1) % maxlen
+        self._hist_n = min(self._hist_n + 1, maxlen)
+
+        if self._hist_idx == 0:
+            # 每绕满一圈按缓冲区精确重算一次累加量，抑制增减带来的浮点累积误差；
+            # 此时最早一帧恰好位于第 0 行，时间下标从 0 重新开始
+            window = self._hist[:, cols].astype(np.float64)
+            np.sum(window, axis=0, out=self._sums[0])
+            np.sum(window * window, axis=0, out=self._sums[1])
+            np.dot(np.arange(maxlen, dtype=np.float64), window, out=self._sums[2])
+            self._t_oldest = 0
+        else:
+            new = row[cols].astype(np.float64)
+            t_new = self._t_oldest + self._hist_n - 1
+            self._sums[0] += new
+            self._sums[1] += new * new
+            self._sums[2] += t_new * new
+
+    def _landmarks_still(self, landmarks_norm):
+        """关键点相对上次计算 AU 的帧最大位移是否低于运动门限"""
+        if self.motion_gate_eps <= 0 or self._last_pts is None or self._last_pts.shape != landmarks_norm.shape:
+            return False
+        return float(np.abs(landmarks_norm - self._last_pts).max()) < self.motion_gate_eps
+
+    def _infer_expression(self, au_vec, temporal_stats, au_features):
+        """微表情、情绪与紧张度共用同一个打包好的 AU 向量，一次完成"""
+        micro_exps = self.micro_detector.detect_from_array(au_vec)
+        emotion_result = self.emotion_engine.infer_from_array(au_vec, temporal_stats, micro_exps, au_features)
+        tension_result = self.tension_engine.compute_from_array(
+            au_vec, temporal_stats.data.get('au12_smile_volatility', 0), emotion_result.emotion_vector
+        )
+        return micro_exps, emotion_result, tension_result
 
     def _calculate_focus_score(self, au_features):
-        yaw = au_features.head_yaw
-        blink_rate = au_features.blink_rate_per_min
-        if abs(yaw) < 0.03 and blink_rate < 30:
+        yaw = abs(au_features.head_yaw)
+        if yaw < 0.03 and au_features.blink_rate_per_min < 30:
             return 0.8
-        elif abs(yaw) > 0.08:
+        elif yaw > 0.08:
             return 0.3
         return 0.5
\ No newline at end of file
@@ -4,16 +4,36 @@
 提供数据日志记录功能
 """
 
+import atexit
 import csv
 import os
+import queue
+import threading
+import weakref
 from datetime import datetime
 from typing import Dict, Any, Optional
 from ..config import LOGS_DIR, LOG_CONFIG
 
+# 已启动后台写入线程、尚未关闭的日志记录器；进程退出时统一关闭，写完队列中剩余的数据。
+# 使用 WeakSet 且只在模块级注册一次 atexit，不会因反复创建记录器而让 atexit 持有已弃用的实例
+_open_loggers = weakref.WeakSet()
+
+
+@atexit.register
+def _close_open_loggers() -> None:
+    for logger in list(_open_loggers):
+        logger.close()
+
 
 class DataLogger:
     """数据日志记录器"""
 
+    # 每写入多少行刷新一次文件缓冲区
+    FLUSH_EVERY = 64
+    # 待写入队列长度上限；后台线程每次最多合并写入 WRITE_BATCH 行
+    QUEUE_SIZE = 256
+    WRITE_BATCH = 32
+
     def __init__(self, log_type: str = 'video'):
         """
         初始化日志记录器
@@ -47,6 +67,15 @@ class DataLogger:
         if not os.path.exists(self.log_file):
             self._write_header()
 
+        self._fieldset = frozenset(self.fieldnames)
+
+        # 追加句柄与后台写入线程在首次记录时创建，之后整个会话复用；
+        # log() 只负责入队，磁盘 I/O 全部在后台线程中完成，不阻塞分析线程
+        self._file = None
+        self._queue = None
+        self._worker = None
+        self._start_lock = threading.Lock()
+
     def _write_header(self) -> None:
         """写入CSV文件头"""
         try:
@@ -64,22 +93,87 @@ class DataLogger:
             data: 要记录的数据字典
 
         返回:
-            bool: 记录是否成功
+            bool: 是否已成功提交（写入队列已满时返回 False，该行被丢弃）
         """
         try:
             # 添加时间戳
             if 'timestamp' not in data:
                 data['timestamp'] = datetime.now().timestamp()
 
-            # 写入数据
-            with open(self.log_file, 'a', newline='', encoding=LOG_CONFIG['encoding']) as f:
-                writer = csv.DictWriter(f, fieldnames=self.fieldnames)
-                writer.writerow(data)
+            # 字段校验在调用线程中完成，非法数据仍然立即返回 False
+            wrong_fields = data.keys() - self._fieldset
+            if wrong_fields:
+                raise ValueError("dict contains fields not in fieldnames: "
+                                 + ", ".join(repr(x) for x in wrong_fields))
+
+            if self._worker is None:
+                self._start_writer()
+            # 入队副本，调用方之后修改或复用该字典不影响待写入的数据
+            self._queue.put_nowait(dict(data))
             return True
+        except queue.Full:
+            return False
         except Exception as e:
             print(f"❌ 日志记录失败: {str(e)}")
             return False
 
+    def _start_writer(self) -> None:
+        """打开日志文件并启动后台写入线程"""
+        with self._start_lock:
+            if self._worker is not None:
+                return
+            self._file = open(self.log_file, 'a', newline='', encoding=LOG_CONFIG['encoding'],
+                              buffering=1 << 16)
+            self._queue = queue.Queue(maxsize=self.QUEUE_SIZE)
+            self._worker = threading.Thread(target=self._drain, args=(self._queue, self._file),
+                                            name="data_logger", daemon=True)
+            self._worker.start()
+            _open_loggers.add(self)
+
+    def _drain(self, log_queue: queue.Queue, log_file) -> None:
+        """后台线程：合并队列中已有的行批量写入，收到 None 后写完剩余数据并退出"""
+        writer = csv.DictWriter(log_file, fieldnames=self.fieldnames)
+        rows_since_flush = 0
+        stop = False
+        while not stop:
+            row = log_queue.get()
+            batch = []
+            while row is not None:
+                batch.append(row)
+                if len(batch) >= self.WRITE_BATCH:
+                    break
+                try:
+                    row = log_queue.get_nowait()
+                except queue.Empty:
+                    break
+            stop = row is None
+
+            if batch:
+                try:
+                    writer.writerows(batch)
+                    rows_since_flush += len(batch)
+                    if rows_since_flush >= self.FLUSH_EVERY:
+                        log_file.flush()
+                        rows_since_flush = 0
+                except Exception as e:
+                    print(f"❌ 日志记录失败: {str(e)}")
+
+    def close(self) -> None:
+        """等待队列中的数据写完后关闭日志文件（可重复调用；之后再次 log 会重新打开文件）"""
+        with self._start_lock:
+            if self._worker is not None:
+                self._queue.put(None)
+                self._worker.join()
+                self._worker = None
+                self._queue = None
+                _open_loggers.discard(self)
+            if self._file is not None:
+                try:
+                    self._file.close()
+                except Exception as e:
+                    print(f"❌ 关闭日志文件失败: {str(e)}")
+                self._file = None
+
     def get_log_path(self) -> str:
         """获取日志文件路径"""
         return self.log_file
\ No newline at end of file
@@ -1,11 +1,27 @@
 import os
 import json
 import pandas as pd
+import matplotlib
+
+# 无界面环境（批量生成报告、服务端进程）设置 JINGXIN_HEADLESS=1：使用 Agg 后端只保存图片，
+# 不初始化 GUI 后端、不弹出窗口
+HEADLESS = os.environ.get('JINGXIN_HEADLESS', '0') == '1'
+if HEADLESS:
+    matplotlib.use('Agg')
+
 import matplotlib.pyplot as plt
 import numpy as np
+from operator import methodcaller
 from typing import Optional, Dict, Any
 from pathlib import Path
 
+# orjson 为可选依赖：安装后用于解析日志中的 JSON 列，未安装时使用标准库
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
 # 处理导入路径，支持直接运行和模块导入
 try:
     from ..config import FACE_EXPRESSION_OUTPUT_DIR
@@ -53,14 +69,31 @@ def get_latest_log_file(log_dir: str = "data/logs", prefix: str = "face_au_log")
     return str(latest_file)
 
 def _safe_json_loads(s: str) -> Dict[str, Any]:
-    """安全解析 JSON 字符串（兼容单引号）"""
-    if pd.isna(s) or s == '{}' or s == '':
+    """安全解析 JSON 字符串（兼容旧日志中 str(dict) 写入的单引号格式）"""
+    if not isinstance(s, str) or s == '{}' or s == '':
         return {}
+    try:
+        return _json_loads(s)
+    except ValueError:
+        pass
     try:
         return json.loads(s.replace("'", '"'))
     except:
         return {}
 
+def _parse_json_column(column: pd.Series) -> pd.Series:
+    """
+    解析日志中的 JSON 字符串列
+
+    相同的字符串只解析一次（微表情等列绝大多数行相同），再按行映射回去；
+    缺失值（NaN）解析为 {}
+    """
+    codes, uniques = pd.factorize(column)
+    parsed = np.empty(len(uniques) + 1, dtype=object)
+    parsed[:-1] = [_safe_json_loads(s) for s in uniques]
+    parsed[-1] = {}  # factorize 将缺失值编码为 -1，正好取到末尾的空字典
+    return pd.Series(parsed[codes], index=column.index)
+
 def plot_emotion_radar(emotion_vector: Dict[str, float], save_path: Optional[str] = None):
     """
     绘制情绪雷达图（支持多维情绪）
@@ -81,8 +114,32 @@ def plot_emotion_radar(emotion_vector: Dict[str, float], save_path: Optional[str
     ax.set_title("情绪雷达图", fontsize=14, pad=20)
 
     if save_path:
-        plt.savefig(save_path, dpi=150, bbox_inches='tight')
-    plt.show()
+        fig.savefig(save_path, dpi=150, bbox_inches='tight')
+    if not HEADLESS:
+        plt.show()
+    plt.close(fig)
+
+# 无界面模式下缓存的综合分析图 Figure，批量生成报告时跨调用复用
+_FIG_CACHE: Dict[str, Any] = {}
+
+def _get_analysis_figure():
+    """
+    获取 4x2 综合分析图
+
+    无界面模式下只在首次调用时创建 Figure（及其画布），之后清空内容、恢复默认子图边距
+    （上次 tight_layout 的调整不影响本次布局）并重建子图后复用；
+    交互模式下图表会显示并由用户关闭，每次新建
+    """
+    fig = _FIG_CACHE.get('main') if HEADLESS else None
+    if fig is None:
+        fig, axes = plt.subplots(4, 2, figsize=(16, 12))
+        if HEADLESS:
+            _FIG_CACHE['main'] = fig
+        return fig, axes
+    fig.clear()
+    fig.subplots_adjust(**{k: matplotlib.rcParams[f'figure.subplot.{k}']
+                           for k in ('left', 'right', 'bottom', 'top', 'wspace', 'hspace')})
+    return fig, fig.subplots(4, 2)
 
 def plot_features_from_csv(csv_path: str = "") -> bool:
     """
@@ -111,20 +168,20 @@ def plot_features_from_csv(csv_path: str = "") -> bool:
             return False
 
         # 解析嵌套字段
-        df['psychological_signals'] = df['psychological_signals'].apply(_safe_json_loads)
-        df['micro_expressions'] = df['micro_expressions'].apply(_safe_json_loads)
-        df['emotion_vector'] = df['emotion_vector'].apply(_safe_json_loads)
+        df['psychological_signals'] = _parse_json_column(df['psychological_signals'])
+        df['micro_expressions'] = _parse_json_column(df['micro_expressions'])
+        df['emotion_vector'] = _parse_json_column(df['emotion_vector'])
 
-        # 提取紧张度
-        df['tension_score'] = df['psychological_signals'].apply(lambda x: x.get('tension_score', 0))
-        df['tension_level'] = df['psychological_signals'].apply(lambda x: x.get('tension_level', 'low'))
+        # 提取紧张度（methodcaller 在 C 层调用 dict.get，无需逐行执行 lambda）
+        df['tension_score'] = df['psychological_signals'].map(methodcaller('get', 'tension_score', 0))
+        df['tension_level'] = df['psychological_signals'].map(methodcaller('get', 'tension_level', 'low'))
 
         # 提取主导情绪
-        df['dominant_emotion'] = df['emotion_vector'].apply(lambda x: x.get('dominant_emotion', 'unknown'))
-        df['confidence'] = df['emotion_vector'].apply(lambda x: x.get('confidence', 0))
+        df['dominant_emotion'] = df['emotion_vector'].map(methodcaller('get', 'dominant_emotion', 'unknown'))
+        df['confidence'] = df['emotion_vector'].map(methodcaller('get', 'confidence', 0))
 
-        # 微表情时间点
-        micro_times = df[df['micro_expressions'].astype(str) != '{}'].index.tolist()
+        # 微表情时间点（非空字典的行；无需把每行字典转成字符串再比较）
+        micro_times = df.index[df['micro_expressions'].map(bool).to_numpy(dtype=bool)].tolist()
 
         # 时间轴
         if 'timestamp' in df.columns and df['timestamp'].dtype in ['float64', 'int64']:
@@ -132,22 +189,24 @@ def plot_features_from_csv(csv_path: str = "") -> bool:
         else:
             time_sec = df.index / 30.0
 
-        # 设置中文字体
+        # 设置中文字体（findfont 只查询字体元数据；fallback_to_default=False 时字体不存在会抛出 ValueError）
+        from matplotlib import font_manager
         chinese_fonts = ['SimHei', 'Microsoft YaHei']
         use_chinese = False
         for font in chinese_fonts:
             try:
-                plt.rcParams['font.sans-serif'] = [font]
-                plt.rcParams['axes.unicode_minus'] = False
-                use_chinese = True
-                break
-            except:
+                font_manager.findfont(font_manager.FontProperties(family=font), fallback_to_default=False)
+            except ValueError:
                 continue
+            plt.rcParams['font.sans-serif'] = [font]
+            plt.rcParams['axes.unicode_minus'] = False
+            use_chinese = True
+            break
 
         title_prefix = "面部心理状态综合分析"
 
         # 创建 4x2 图表
-        fig, axes = plt.subplots(4, 2, figsize=(16, 12))
+        fig, axes = _get_analysis_figure()
         fig.suptitle(title_prefix, fontsize=16)
 
         # 1. 紧张度 + 微表情标记
@@ -214,12 +273,13 @@ def plot_features_from_csv(csv_path: str = "") -> bool:
                 axes[3, 1].set_ylim(0, 1)
                 axes[3, 1].set_title('末帧情绪雷达图')
 
-        plt.tight_layout()
+        fig.tight_layout()
         # 保存到output/face_expression目录
         log_filename = Path(csv_path).stem
         save_img_path = os.path.join(FACE_EXPRESSION_OUTPUT_DIR, f'{log_filename}_enhanced_analysis.png')
-        plt.savefig(save_img_path, dpi=150, bbox_inches='tight')
-        plt.show()
+        fig.savefig(save_img_path, dpi=150, bbox_inches='tight')
+        if not HEADLESS:
+            plt.show()
 
         # 单独保存雷达图到output/face_expression目录
         radar_path = os.path.join(FACE_EXPRESSION_OUTPUT_DIR, f'{log_filename}_emotion_radar.png')
@@ -254,6 +314,9 @@ def plot_features_from_csv(csv_path: str = "") -> bool:
 
         fig.text(0.95, 0.05, summary_text, fontsize=10, ha='right', va='bottom',
                  bbox=dict(boxstyle='round,pad=0.5', facecolor='yellow', alpha=0.3))
+        # 交互模式下释放图表，长时间运行的进程中反复调用不会累积 Figure（无界面模式下缓存复用）
+        if not HEADLESS:
+            plt.close(fig)
 
         print(f"✅ 可视化已保存至:\n - {save_img_path}\n - {radar_path}")
         return True
@@ -8,9 +8,14 @@ FastAPI应用
 
 from fastapi import FastAPI, HTTPException
 from pydantic import BaseModel
+import asyncio
+import io
+import queue
+import threading
 import cv2
 import numpy as np
 import base64
+from PIL import Image
 
 from gesture_analysis.analyzers import HandAnalyzer, ShoulderAnalyzer, ArmAnalyzer
 from ..inference import EmotionInferencer
@@ -29,6 +34,126 @@ mp_pose = mp.solutions.pose
 hands = mp_hands.Hands(**MEDIAPIPE_CONFIG['hands'])
 pose = mp_pose.Pose(**MEDIAPIPE_CONFIG['pose'])
 
+# 送入 MediaPipe 前图片长边的上限（像素）：手部/姿态模型内部只在 224/256 分辨率上推理，
+# 关键点为归一化坐标，缩小不影响后续特征
+MAX_INPUT_SIZE = 640
+# 由大到小尝试的降采样解码倍率（JPEG 在 DCT 阶段直接按倍率解码，省去全尺寸解码）
+_REDUCED_DECODE_FLAGS = (
+    (8, cv2.IMREAD_REDUCED_COLOR_8),
+    (4, cv2.IMREAD_REDUCED_COLOR_4),
+    (2, cv2.IMREAD_REDUCED_COLOR_2),
+)
+
+
+def _decode_image(image_data):
+    """
+    将图片字节解码为 BGR 图像，长边超过 MAX_INPUT_SIZE 时降采样
+
+    先用 Pillow 只读文件头取得尺寸，选择解码后长边仍不小于 MAX_INPUT_SIZE 的最大倍率
+    降采样解码，再用 INTER_AREA 缩小到上限。无法解码时返回 None
+    """
+    flags = cv2.IMREAD_COLOR
+    try:
+        width, height = Image.open(io.BytesIO(image_data)).size
+    except Exception:
+        # Pillow 无法识别的格式交给 OpenCV 按原尺寸解码
+        pass
+    else:
+        long_edge = max(width, height)
+        for factor, reduced_flags in _REDUCED_DECODE_FLAGS:
+            if long_edge // factor >= MAX_INPUT_SIZE:
+                flags = reduced_flags
+                break
+
+    image = cv2.imdecode(np.frombuffer(image_data, np.uint8), flags)
+    if image is None:
+        return None
+    long_edge = max(image.shape[:2])
+    if long_edge > MAX_INPUT_SIZE:
+        scale = MAX_INPUT_SIZE / long_edge
+        image = cv2.resize(image, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    return image
+
+
+# 每个推理线程待处理帧的上限：队列满时直接拒绝新请求，避免排队延迟无限增长
+INFERENCE_QUEUE_SIZE = 4
+
+
+def _resolve_future(future, result, error):
+    """在事件循环线程中写入推理结果（请求已取消时忽略）"""
+    if future.cancelled():
+        return
+    if error is not None:
+        future.set_exception(error)
+    else:
+        future.set_result(result)
+
+
+class _InferenceWorker:
+    """
+    独占一个 MediaPipe 图对象的常驻推理线程
+
+    请求协程把 RGB 帧放入有界队列后 await 返回的 future；线程推理完成后
+    通过 call_soon_threadsafe 回到事件循环写入结果。图对象只在本线程中调用，
+    无需加锁；手部与姿态两个线程互不阻塞（MediaPipe 推理期间释放 GIL），
+    一个请求等待手部推理时姿态线程已可处理下一个请求的帧；后处理在请求协程中进行，
+    推理线程可立即处理下一帧
+    """
+
+    def __init__(self, graph, name):
+        self._graph = graph
+        self._queue = queue.Queue(maxsize=INFERENCE_QUEUE_SIZE)
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def submit(self, image_rgb):
+        """
+        提交一帧，返回完成时携带 process() 结果的 asyncio.Future
+
+        异常:
+            queue.Full: 待处理帧已达上限
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._queue.put_nowait((image_rgb, future, loop))
+        return future
+
+    def _run(self):
+        while True:
+            image_rgb, future, loop = self._queue.get()
+            if future.cancelled():
+                # 请求已放弃（如客户端断开），跳过推理
+                continue
+            try:
+                result, error = self._graph.process(image_rgb), None
+            except Exception as e:
+                result, error = None, e
+            loop.call_soon_threadsafe(_resolve_future, future, result, error)
+
+
+hands_worker = _InferenceWorker(hands, "gesture_hands")
+pose_worker = _InferenceWorker(pose, "gesture_pose")
+
+# 姿态模型左右手腕（15/16）可见度之和不超过该值时视为画面中没有手，跳过手部推理
+HAND_GATE_VISIBILITY = 0.8
+
+
+def _hands_may_be_visible(pose_results):
+    """根据姿态检测的手腕可见度判断是否需要手部推理；未检测到姿态时保守地返回 True"""
+    if not pose_results.pose_landmarks:
+        return True
+    landmark = pose_results.pose_landmarks.landmark
+    return landmark[15].visibility + landmark[16].visibility > HAND_GATE_VISIBILITY
+
+
+async def _infer(worker, image_rgb):
+    """提交一帧到推理线程并等待结果，队列已满时返回 503"""
+    try:
+        future = worker.submit(image_rgb)
+    except queue.Full:
+        raise HTTPException(status_code=503, detail="服务繁忙，请稍后重试")
+    return await future
+
 # 初始化分析器
 left_hand_analyzer = HandAnalyzer(hand_id=0)
 right_hand_analyzer = HandAnalyzer(hand_id=1)
@@ -75,23 +200,26 @@ async def analyze_image(request: ImageRequest):
         分析结果
     """
     try:
-        # 解码图片
-        image_data = base64.b64decode(request.image)
-        nparr = np.frombuffer(image_data, np.uint8)
-        image = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+        # 解码图片（大图降采样解码）
+        image = _decode_image(base64.b64decode(request.image))
 
         if image is None:
             raise HTTPException(status_code=400, detail="无法解码图片")
 
-        # 转换为RGB
-        image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+        # 转换为RGB：解码结果为本请求独占，直接原地转换，不再分配新图像
+        image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB, dst=image)
+
+        # 先做姿态推理，两侧手腕都不可见时跳过手部推理（常见的上半身画面可省去一次完整推理）
+        shoulder_results_raw = await _infer(pose_worker, image_rgb)
+        hand_results_raw = None
+        if _hands_may_be_visible(shoulder_results_raw):
+            hand_results_raw = await _infer(hands_worker, image_rgb)
 
-        # 处理手部
-        hand_results_raw = hands.process(image_rgb)
+        # 处理手部（跳过时按未检测到手处理，hand_score 取默认 50.0）
         detected_hands = 0
         hand_scores = []
 
-        if hand_results_raw.multi_hand_landmarks:
+        if hand_results_raw is not None and hand_results_raw.multi_hand_landmarks:
             for hand_id, lm_obj in enumerate(hand_results_raw.multi_hand_landmarks):
                 if hand_id >= 2: break
                 analyzer = left_hand_analyzer if hand_id == 0 else right_hand_analyzer
@@ -100,7 +228,6 @@ async def analyze_image(request: ImageRequest):
                 detected_hands += 1
 
         # 处理肩部
-        shoulder_results_raw = pose.process(image_rgb)
         shoulder_score = 50.0
 
         if shoulder_results_raw.pose_landmarks:
@@ -153,6 +280,9 @@ async def analyze_image(request: ImageRequest):
             "used_features": emotion_result["used_features"]
         }
 
+    except HTTPException:
+        # 重新抛出 HTTP 异常（400 / 503），不包装为 500
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"分析失败: {str(e)}")
 
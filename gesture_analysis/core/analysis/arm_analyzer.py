@@ -5,8 +5,8 @@
 提供手腕和手肘特征提取与评估功能
 """
 
+import math
 import numpy as np
-from collections import deque
 from typing import Dict, Any, Optional, Tuple
 from gesture_analysis.config import ARM_CONFIG
 
@@ -31,9 +31,20 @@ class ArmAnalyzer:
         self.arm_id = arm_id
         self.config = config or ARM_CONFIG.copy()
 
-        # 初始化历史数据
-        self.wrist_history = deque(maxlen=int(self.config['history_length']))
-        self.elbow_history = deque(maxlen=int(self.config['history_length']))
+        # 逐帧用到的配置项在初始化时取出为实例属性，热路径上不再查字典
+        self._jitter_multiplier = float(self.config['jitter_multiplier'])
+        self._ideal_angle_min = float(self.config['ideal_angle_min'])
+        self._ideal_angle_max = float(self.config['ideal_angle_max'])
+        self._acceptable_angle_min = float(self.config['acceptable_angle_min'])
+        self._acceptable_angle_max = float(self.config['acceptable_angle_max'])
+        self._stability_bonus = float(self.config['stability_bonus'])
+
+        # 初始化历史数据：预分配的环形缓冲区，手腕与手肘逐帧同步写入，共用写入位置
+        history_length = int(self.config['history_length'])
+        self._wrist_hist = np.zeros((history_length, 2), dtype=np.float64)
+        self._elbow_hist = np.zeros((history_length, 2), dtype=np.float64)
+        self._hist_idx = 0  # 下一帧写入的行
+        self._hist_n = 0    # 已写入的有效行数
 
         # 分析状态标志
         self._is_valid = False
@@ -90,25 +101,23 @@ class ArmAnalyzer:
                 shoulder = (float(landmarks.get('shoulder_x', 0)), float(landmarks.get('shoulder_y', 0)))
 
             # 更新历史数据
-            self.wrist_history.append(wrist)
-            self.elbow_history.append(elbow)
+            self._push_history(wrist, elbow)
 
             # 计算特征
-            wrist_jitter = self._calculate_jitter(self.wrist_history)
-            elbow_jitter = self._calculate_jitter(self.elbow_history)
+            wrist_jitter = self._calculate_jitter(self._wrist_hist)
+            elbow_jitter = self._calculate_jitter(self._elbow_hist)
             arm_angle = self._calculate_arm_angle(shoulder, elbow, wrist)
             arm_stability = self._calculate_arm_stability(wrist_jitter, elbow_jitter)
             arm_score = self._compute_arm_score(wrist_jitter, elbow_jitter, arm_angle, arm_stability)
 
-            # 更新结果
-            self.results = {
-                "arm_score": float(np.clip(arm_score, 0.0, 100.0)),
-                "wrist_jitter": wrist_jitter,
-                "elbow_jitter": elbow_jitter,
-                "arm_angle": arm_angle,
-                "arm_stability": arm_stability,
-                "is_valid": True
-            }
+            # 更新结果：原地改写 reset() 中分配的字典，不再逐帧新建
+            results = self.results
+            results["arm_score"] = float(np.clip(arm_score, 0.0, 100.0))
+            results["wrist_jitter"] = wrist_jitter
+            results["elbow_jitter"] = elbow_jitter
+            results["arm_angle"] = arm_angle
+            results["arm_stability"] = arm_stability
+            results["is_valid"] = True
             self._is_valid = True
 
         except (AttributeError, IndexError, TypeError, KeyError) as e:
@@ -119,20 +128,29 @@ class ArmAnalyzer:
         self.results["is_valid"] = False
         self._is_valid = False
 
-    def _calculate_jitter(self, history: deque) -> float:
+    def _push_history(self, wrist: Tuple[float, float], elbow: Tuple[float, float]) -> None:
+        """将手腕与手肘坐标写入环形缓冲区"""
+        maxlen = len(self._wrist_hist)
+        self._wrist_hist[self._hist_idx] = wrist
+        self._elbow_hist[self._hist_idx] = elbow
+        self._hist_idx = (self._hist_idx + 1) % maxlen
+        self._hist_n = min(self._hist_n + 1, maxlen)
+
+    def _calculate_jitter(self, history: np.ndarray) -> float:
         """
         计算抖动幅度
 
         参数:
-            history: 位置历史记录
+            history: 位置历史环形缓冲区（_wrist_hist 或 _elbow_hist）
 
         返回:
             抖动幅度
         """
-        if len(history) < min(10, history.maxlen // 3):
+        n = self._hist_n
+        if n < min(10, len(history) // 3):
             return 0.0
-        positions = np.array(history)
-        jitter = np.std(positions, axis=0).mean()
+        # 标准差与行序无关，直接在缓冲区的有效行上计算
+        jitter = history[:n].std(axis=0).mean()
         return float(jitter)
 
     def _calculate_arm_angle(self, shoulder: Tuple[float, float], 
@@ -150,21 +168,21 @@ class ArmAnalyzer:
             手臂角度（度）
         """
         try:
-            # 计算向量
-            vector_shoulder_elbow = np.array([elbow[0] - shoulder[0], elbow[1] - shoulder[1]])
-            vector_elbow_wrist = np.array([wrist[0] - elbow[0], wrist[1] - elbow[1]])
+            # 计算向量（二维向量直接用标量运算，避免 NumPy 小数组的调用开销）
+            upper_x, upper_y = elbow[0] - shoulder[0], elbow[1] - shoulder[1]
+            fore_x, fore_y = wrist[0] - elbow[0], wrist[1] - elbow[1]
 
             # 计算角度
-            dot_product = np.dot(vector_shoulder_elbow, vector_elbow_wrist)
-            norm_shoulder = np.linalg.norm(vector_shoulder_elbow)
-            norm_wrist = np.linalg.norm(vector_elbow_wrist)
+            dot_product = upper_x * fore_x + upper_y * fore_y
+            norm_shoulder = math.hypot(upper_x, upper_y)
+            norm_wrist = math.hypot(fore_x, fore_y)
 
             if norm_shoulder == 0 or norm_wrist == 0:
                 return 0.0
 
             cos_angle = dot_product / (norm_shoulder * norm_wrist)
-            cos_angle = np.clip(cos_angle, -1.0, 1.0)
-            angle = np.degrees(np.arccos(cos_angle))
+            cos_angle = min(max(cos_angle, -1.0), 1.0)
+            angle = math.degrees(math.acos(cos_angle))
 
             return float(angle)
         except Exception:
@@ -183,7 +201,7 @@ class ArmAnalyzer:
         """
         avg_jitter = (wrist_jitter + elbow_jitter) / 2.0
         # 抖动越小，稳定性越高
-        stability = max(0.0, 1.0 - avg_jitter * self.config['jitter_multiplier'] / 100.0)
+        stability = max(0.0, 1.0 - avg_jitter * self._jitter_multiplier / 100.0)
         return float(stability)
 
     def _compute_arm_score(self, wrist_jitter: float, elbow_jitter: float, 
@@ -205,18 +223,18 @@ class ArmAnalyzer:
 
         # 抖动惩罚
         avg_jitter = (wrist_jitter + elbow_jitter) / 2.0
-        jitter_penalty = avg_jitter * self.config['jitter_multiplier']
+        jitter_penalty = avg_jitter * self._jitter_multiplier
 
         # 角度评分（使用配置中的角度参数）
-        if self.config['ideal_angle_min'] <= arm_angle <= self.config['ideal_angle_max']:
+        if self._ideal_angle_min <= arm_angle <= self._ideal_angle_max:
             angle_bonus = 10.0
-        elif self.config['acceptable_angle_min'] <= arm_angle <= self.config['acceptable_angle_max']:
+        elif self._acceptable_angle_min <= arm_angle <= self._acceptable_angle_max:
             angle_bonus = 5.0
         else:
             angle_bonus = 0.0
 
         # 稳定性奖励
-        stability_bonus = arm_stability * self.config['stability_bonus']
+        stability_bonus = arm_stability * self._stability_bonus
 
         # 综合评分
         score = base_score - jitter_penalty + angle_bonus + stability_bonus
@@ -4,14 +4,36 @@
 提供手部特征提取和抗压能力评估功能
 """
 
+import itertools
+import math
+from operator import attrgetter
+
 import numpy as np
-from collections import deque
-from typing import Dict, Any, Optional, Tuple
+from typing import Dict, Any, List, Optional, Tuple
 from gesture_analysis.config import HAND_CONFIG
 
 # 定义明确的返回类型，便于类型检查和文档生成
 HandAnalysisResult = Dict[str, Any]
 
+HAND_LANDMARK_COUNT = 21
+
+# 握拳判断：四指（指尖, 远端指间关节）
+_FIST_PAIRS = ((8, 7), (12, 11), (16, 15), (20, 19))
+# 张开度：五指指尖到掌根（ID=0）的距离
+_SPREAD_TIPS = (4, 8, 12, 16, 20)
+
+_get_xy = attrgetter('x', 'y')
+
+
+def _landmarks_to_points(landmarks) -> List[Tuple[float, float]]:
+    """
+    将前 21 个手部关键点一次性转换为 (x, y) 元组列表，供各项特征共用
+
+    每项特征只涉及 4~5 个二维距离，用 math.dist 逐个计算比 NumPy 花式索引加 norm
+    的调用开销小得多
+    """
+    return list(map(_get_xy, itertools.islice(landmarks, HAND_LANDMARK_COUNT)))
+
 
 class HandAnalyzer:
     """手部分析器"""
@@ -30,8 +52,17 @@ class HandAnalyzer:
         self.hand_id = hand_id
         self.config = config or HAND_CONFIG.copy()  # 避免外部修改污染
 
-        # 初始化历史数据：仅跟踪食指指尖（ID=8）
-        self.tip_history = {8: deque(maxlen=int(self.config['history_length']))}
+        # 逐帧用到的配置项在初始化时取出为实例属性，热路径上不再查字典
+        self._fist_threshold = float(self.config['fist_threshold'])
+        self._jitter_multiplier = float(self.config['jitter_multiplier'])
+        self._fist_penalty = float(self.config['fist_penalty'])
+        self._spread_threshold = float(self.config['spread_threshold'])
+        self._spread_bonus_multiplier = float(self.config['spread_bonus_multiplier'])
+
+        # 初始化历史数据：仅跟踪食指指尖（ID=8），预分配的环形缓冲区逐帧覆盖最旧的一行
+        self._tip_hist = np.zeros((int(self.config['history_length']), 2), dtype=np.float64)
+        self._tip_idx = 0  # 下一帧写入的行
+        self._tip_n = 0    # 已写入的有效行数
 
         # 分析状态标志
         self._is_valid = False  # 是否有有效 landmarks 输入
@@ -62,27 +93,29 @@ class HandAnalyzer:
             self._handle_invalid_input()
             return
 
-        if len(landmarks) < 21:
-            raise ValueError(f"手部 landmarks 长度不足，期望 >=21，实际: {len(landmarks)}")
+        if len(landmarks) < HAND_LANDMARK_COUNT:
+            raise ValueError(f"手部 landmarks 长度不足，期望 >={HAND_LANDMARK_COUNT}，实际: {len(landmarks)}")
 
         try:
+            # 关键点只转换一次，后续特征共用
+            points = _landmarks_to_points(landmarks)
+
             # 更新食指指尖历史
-            self.tip_history[8].append((float(landmarks[8].x), float(landmarks[8].y)))
+            self._push_tip(points[8])
 
             # 计算特征
             jitter = self._calculate_jitter()
-            is_fist = self._is_fist(landmarks)
-            spread = self._calculate_finger_spread(landmarks)
+            is_fist = self._is_fist(points)
+            spread = self._calculate_finger_spread(points)
             score = self._compute_resilience_score(jitter, is_fist, spread)
 
-            # 更新结果
-            self.results = {
-                "resilience_score": float(np.clip(score, 0.0, 100.0)),
-                "jitter": jitter,
-                "fist_status": bool(is_fist),
-                "spread": spread,
-                "is_valid": True
-            }
+            # 更新结果：原地改写 reset() 中分配的字典，不再逐帧新建
+            results = self.results
+            results["resilience_score"] = float(np.clip(score, 0.0, 100.0))
+            results["jitter"] = jitter
+            results["fist_status"] = bool(is_fist)
+            results["spread"] = spread
+            results["is_valid"] = True
             self._is_valid = True
 
         except (AttributeError, IndexError, TypeError) as e:
@@ -96,60 +129,48 @@ class HandAnalyzer:
         self.results["is_valid"] = False
         self._is_valid = False
 
+    def _push_tip(self, tip: Tuple[float, float]) -> None:
+        """将指尖坐标写入环形缓冲区"""
+        maxlen = len(self._tip_hist)
+        self._tip_hist[self._tip_idx] = tip
+        self._tip_idx = (self._tip_idx + 1) % maxlen
+        self._tip_n = min(self._tip_n + 1, maxlen)
+
     def _calculate_jitter(self) -> float:
         """计算手指抖动幅度"""
-        if len(self.tip_history[8]) < min(10, self.tip_history[8].maxlen // 3):
+        if self._tip_n < min(10, len(self._tip_hist) // 3):
             return 0.0
-        positions = np.array(self.tip_history[8])
-        jitter = np.std(positions, axis=0).mean()
+        # 标准差与行序无关，直接在缓冲区的有效行上计算，无需按时间顺序重排
+        jitter = self._tip_hist[:self._tip_n].std(axis=0).mean()
         return float(jitter)
 
-    def _is_fist(self, landmarks, threshold: Optional[float] = None) -> bool:
+    def _is_fist(self, points: List[Tuple[float, float]], threshold: Optional[float] = None) -> bool:
         """
         判断是否握拳
 
         参数:
-            landmarks: 手部关键点
+            points: 21 个手部关键点的 (x, y) 列表
             threshold: 握拳阈值，如果为None则使用配置中的值
 
         返回:
             是否握拳的布尔值
         """
-        threshold = threshold or self.config['fist_threshold']
-        tips = [8, 12, 16, 20]
-        dips = [7, 11, 15, 19]
-        try:
-            distances = [
-                np.linalg.norm(
-                    np.array([landmarks[tip].x, landmarks[tip].y]) -
-                    np.array([landmarks[dip].x, landmarks[dip].y])
-                )
-                for tip, dip in zip(tips, dips)
-            ]
-            return bool(np.mean(distances) < threshold)
-        except (AttributeError, IndexError):
-            return False
-
-    def _calculate_finger_spread(self, landmarks) -> float:
+        threshold = threshold or self._fist_threshold
+        distance_sum = sum(math.dist(points[tip], points[dip]) for tip, dip in _FIST_PAIRS)
+        return distance_sum / len(_FIST_PAIRS) < threshold
+
+    def _calculate_finger_spread(self, points: List[Tuple[float, float]]) -> float:
         """
         计算手指张开度
 
         参数:
-            landmarks: 手部关键点
+            points: 21 个手部关键点的 (x, y) 列表
 
         返回:
             手指张开度值
         """
-        try:
-            palm = np.array([landmarks[0].x, landmarks[0].y])
-            tips = [4, 8, 12, 16, 20]
-            spread = np.mean([
-                np.linalg.norm(np.array([landmarks[i].x, landmarks[i].y]) - palm)
-                for i in tips
-            ])
-            return float(spread)
-        except (AttributeError, IndexError):
-            return 0.0
+        palm = points[0]
+        return sum(math.dist(points[tip], palm) for tip in _SPREAD_TIPS) / len(_SPREAD_TIPS)
 
     def _compute_resilience_score(self, jitter: float, is_fist: bool, spread: float) -> float:
         """
@@ -163,14 +184,14 @@ class HandAnalyzer:
         返回:
             抗压能力评分 (0-100)
         """
-        jitter_penalty = jitter * self.config['jitter_multiplier']
+        jitter_penalty = jitter * self._jitter_multiplier
         jitter_score = max(0.0, 70.0 - jitter_penalty)
-        fist_penalty = self.config['fist_penalty'] if is_fist else 0.0
+        fist_penalty = self._fist_penalty if is_fist else 0.0
         spread_bonus = 0.0
-        if spread > self.config['spread_threshold']:
+        if spread > self._spread_threshold:
             spread_bonus = min(
-                self.config['spread_bonus_multiplier'],
-                (spread - self.config['spread_threshold']) * self.config['spread_bonus_multiplier']
+                self._spread_bonus_multiplier,
+                (spread - self._spread_threshold) * self._spread_bonus_multiplier
             )
         score = jitter_score - fist_penalty + spread_bonus
         return float(score)
@@ -5,7 +5,6 @@
 """
 
 import numpy as np
-from collections import deque
 from typing import Dict, Any, Optional, Tuple
 from gesture_analysis.config import SHOULDER_CONFIG
 
@@ -25,10 +24,18 @@ class ShoulderAnalyzer:
         """
         self.config = config or SHOULDER_CONFIG.copy()
 
-        self.shoulder_history = {
-            'left': deque(maxlen=int(self.config['history_length'])),
-            'right': deque(maxlen=int(self.config['history_length']))
-        }
+        # 逐帧用到的配置项在初始化时取出为实例属性，热路径上不再查字典
+        self._baseline_frames_needed = self.config['baseline_frames_needed']
+        self._baseline_smoothing = float(self.config['baseline_smoothing'])
+        self._max_shrug_diff = float(self.config['max_shrug_diff'])
+        self._jitter_multiplier = float(self.config['jitter_multiplier'])
+        self._shrug_penalty = float(self.config['shrug_penalty'])
+
+        # 左右肩坐标历史：预分配的环形缓冲区，每行为 [lx, ly, rx, ry]，
+        # 两肩同行存放，一次 std 即可得到两侧的抖动
+        self._shoulder_hist = np.zeros((int(self.config['history_length']), 4), dtype=np.float64)
+        self._hist_idx = 0  # 下一帧写入的行
+        self._hist_n = 0    # 已写入的有效行数
 
         # 校准状态
         self.shoulder_baseline_y: Optional[float] = None
@@ -72,22 +79,21 @@ class ShoulderAnalyzer:
         try:
             left_shoulder = (float(landmarks[11].x), float(landmarks[11].y))
             right_shoulder = (float(landmarks[12].x), float(landmarks[12].y))
-            self.shoulder_history['left'].append(left_shoulder)
-            self.shoulder_history['right'].append(right_shoulder)
+            self._push_history(left_shoulder, right_shoulder)
 
             left_jitter, right_jitter = self._calculate_shoulder_jitter()
             shrug = self._calculate_shrug_level(landmarks)
             score = self._compute_shoulder_score(left_jitter, right_jitter, shrug)
 
             is_calibrated = self.is_calibrated()
-            self.results = {
-                "left_jitter": left_jitter,
-                "right_jitter": right_jitter,
-                "shrug_level": shrug,
-                "shoulder_score": float(np.clip(score, 0.0, 100.0)),
-                "is_valid": True,
-                "is_calibrated": is_calibrated
-            }
+            # 更新结果：原地改写 reset() 中分配的字典，不再逐帧新建
+            results = self.results
+            results["left_jitter"] = left_jitter
+            results["right_jitter"] = right_jitter
+            results["shrug_level"] = shrug
+            results["shoulder_score"] = float(np.clip(score, 0.0, 100.0))
+            results["is_valid"] = True
+            results["is_calibrated"] = is_calibrated
             self._is_valid = True
 
         except (AttributeError, IndexError, TypeError) as e:
@@ -102,6 +108,13 @@ class ShoulderAnalyzer:
         })
         self._is_valid = False
 
+    def _push_history(self, left_shoulder: Tuple[float, float], right_shoulder: Tuple[float, float]) -> None:
+        """将左右肩坐标写入环形缓冲区"""
+        maxlen = len(self._shoulder_hist)
+        self._shoulder_hist[self._hist_idx] = (*left_shoulder, *right_shoulder)
+        self._hist_idx = (self._hist_idx + 1) % maxlen
+        self._hist_n = min(self._hist_n + 1, maxlen)
+
     def _calculate_shoulder_jitter(self) -> Tuple[float, float]:
         """
         计算肩部抖动幅度
@@ -109,14 +122,13 @@ class ShoulderAnalyzer:
         返回:
             (左肩抖动, 右肩抖动)
         """
-        min_len = min(10, self.shoulder_history['left'].maxlen // 3)
-        if (len(self.shoulder_history['left']) < min_len or
-            len(self.shoulder_history['right']) < min_len):
+        n = self._hist_n
+        if n < min(10, len(self._shoulder_hist) // 3):
             return 0.0, 0.0
 
-        left_jitter = np.std(np.array(self.shoulder_history['left']), axis=0).mean()
-        right_jitter = np.std(np.array(self.shoulder_history['right']), axis=0).mean()
-        return float(left_jitter), float(right_jitter)
+        # 标准差与行序无关，直接在缓冲区的有效行上计算；四列一次求出，再按左右肩拆分
+        std = self._shoulder_hist[:n].std(axis=0)
+        return float(std[:2].mean()), float(std[2:].mean())
 
     def _calculate_shrug_level(self, landmarks) -> float:
         """
@@ -136,13 +148,13 @@ class ShoulderAnalyzer:
             return 0.0
 
         # 校准阶段
-        if self.baseline_frames_collected < self.config['baseline_frames_needed']:
+        if self.baseline_frames_collected < self._baseline_frames_needed:
             if self.shoulder_baseline_y is None:
                 self.shoulder_baseline_y = avg_y
             else:
                 self.shoulder_baseline_y = (
-                    self.shoulder_baseline_y * self.config['baseline_smoothing'] +
-                    avg_y * (1 - self.config['baseline_smoothing'])
+                    self.shoulder_baseline_y * self._baseline_smoothing +
+                    avg_y * (1 - self._baseline_smoothing)
                 )
             self.baseline_frames_collected += 1
             return 0.0
@@ -150,7 +162,7 @@ class ShoulderAnalyzer:
         # 耸肩判断：y 值越小表示位置越高（图像坐标系）
         if avg_y < self.shoulder_baseline_y:
             shrug_diff = self.shoulder_baseline_y - avg_y
-            shrug_norm = min(shrug_diff, self.config['max_shrug_diff']) / self.config['max_shrug_diff']
+            shrug_norm = min(shrug_diff, self._max_shrug_diff) / self._max_shrug_diff
             return float(shrug_norm)
         return 0.0
 
@@ -167,8 +179,8 @@ class ShoulderAnalyzer:
             肩部评分 (0-100)
         """
         avg_jitter = (left_jitter + right_jitter) / 2.0
-        jitter_penalty = avg_jitter * self.config['jitter_multiplier']
-        shrug_penalty = shrug * self.config['shrug_penalty']
+        jitter_penalty = avg_jitter * self._jitter_multiplier
+        shrug_penalty = shrug * self._shrug_penalty
         score = 70.0 - jitter_penalty - shrug_penalty
         return float(score)
 
@@ -188,7 +200,7 @@ class ShoulderAnalyzer:
         返回:
             是否已校准的布尔值
         """
-        return self.baseline_frames_collected >= self.config['baseline_frames_needed']
+        return self.baseline_frames_collected >= self._baseline_frames_needed
 
     def is_valid(self) -> bool:
         """返回当前分析状态是否基于有效输入"""
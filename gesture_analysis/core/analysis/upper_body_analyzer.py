@@ -5,7 +5,6 @@
 """
 
 import numpy as np
-from collections import deque
 from typing import Dict, Any, Optional, Tuple
 from gesture_analysis.config import ARM_CONFIG
 import math
@@ -26,9 +25,16 @@ class UpperBodyAnalyzer:
         """
         self.config = config or ARM_CONFIG.copy()
 
-        # 初始化历史数据
-        self.head_history = deque(maxlen=int(self.config['history_length']))
-        self.torso_history = deque(maxlen=int(self.config['history_length']))
+        # 逐帧用到的配置项在初始化时取出为实例属性，热路径上不再查字典
+        self._jitter_multiplier = float(self.config['jitter_multiplier'])
+        self._stability_bonus = float(self.config['stability_bonus'])
+
+        # 初始化历史数据：预分配的环形缓冲区，头部与躯干逐帧同步写入，共用写入位置
+        history_length = int(self.config['history_length'])
+        self._head_hist = np.zeros((history_length, 2), dtype=np.float64)
+        self._torso_hist = np.zeros((history_length, 2), dtype=np.float64)
+        self._hist_idx = 0  # 下一帧写入的行
+        self._hist_n = 0    # 已写入的有效行数
 
         # 分析状态
         self._is_valid = False
@@ -77,27 +83,25 @@ class UpperBodyAnalyzer:
             )
 
             # 更新历史数据
-            self.head_history.append(nose)
-            self.torso_history.append(torso_center)
+            self._push_history(nose, torso_center)
 
             # 计算特征
-            head_jitter = self._calculate_jitter(self.head_history)
-            torso_jitter = self._calculate_jitter(self.torso_history)
+            head_jitter = self._calculate_jitter(self._head_hist)
+            torso_jitter = self._calculate_jitter(self._torso_hist)
             head_tilt = self._calculate_head_tilt(landmarks)
             torso_stability = self._calculate_torso_stability(torso_jitter)
             head_score = self._compute_head_score(head_jitter, head_tilt)
             torso_score = self._compute_torso_score(torso_jitter, torso_stability)
 
-            # 更新结果
-            self.results = {
-                "head_score": float(np.clip(head_score, 0.0, 100.0)),
-                "torso_score": float(np.clip(torso_score, 0.0, 100.0)),
-                "head_jitter": head_jitter,
-                "torso_jitter": torso_jitter,
-                "head_tilt": head_tilt,
-                "torso_stability": torso_stability,
-                "is_valid": True
-            }
+            # 更新结果：原地改写 reset() 中分配的字典，不再逐帧新建
+            results = self.results
+            results["head_score"] = float(np.clip(head_score, 0.0, 100.0))
+            results["torso_score"] = float(np.clip(torso_score, 0.0, 100.0))
+            results["head_jitter"] = head_jitter
+            results["torso_jitter"] = torso_jitter
+            results["head_tilt"] = head_tilt
+            results["torso_stability"] = torso_stability
+            results["is_valid"] = True
             self._is_valid = True
 
         except (AttributeError, IndexError, TypeError) as e:
@@ -108,20 +112,29 @@ class UpperBodyAnalyzer:
         self.results["is_valid"] = False
         self._is_valid = False
 
-    def _calculate_jitter(self, history: deque) -> float:
+    def _push_history(self, head: Tuple[float, float], torso: Tuple[float, float]) -> None:
+        """将头部与躯干中心坐标写入环形缓冲区"""
+        maxlen = len(self._head_hist)
+        self._head_hist[self._hist_idx] = head
+        self._torso_hist[self._hist_idx] = torso
+        self._hist_idx = (self._hist_idx + 1) % maxlen
+        self._hist_n = min(self._hist_n + 1, maxlen)
+
+    def _calculate_jitter(self, history: np.ndarray) -> float:
         """
         计算抖动幅度
 
         参数:
-            history: 位置历史记录
+            history: 位置历史环形缓冲区（_head_hist 或 _torso_hist）
 
         返回:
             抖动幅度
         """
-        if len(history) < min(10, history.maxlen // 3):
+        n = self._hist_n
+        if n < min(10, len(history) // 3):
             return 0.0
-        positions = np.array(history)
-        jitter = np.std(positions, axis=0).mean()
+        # 标准差与行序无关，直接在缓冲区的有效行上计算
+        jitter = history[:n].std(axis=0).mean()
         return float(jitter)
 
     def _calculate_head_tilt(self, landmarks) -> float:
@@ -136,12 +149,11 @@ class UpperBodyAnalyzer:
         """
         try:
             # 使用左右耳连线作为参考
-            left_ear = np.array([landmarks[7].x, landmarks[7].y])
-            right_ear = np.array([landmarks[8].x, landmarks[8].y])
+            left_ear = landmarks[7]
+            right_ear = landmarks[8]
 
             # 计算水平角度
-            ear_vector = right_ear - left_ear
-            angle = math.degrees(math.atan2(ear_vector[1], ear_vector[0]))
+            angle = math.degrees(math.atan2(right_ear.y - left_ear.y, right_ear.x - left_ear.x))
 
             return float(abs(angle))
         except (AttributeError, IndexError):
@@ -158,7 +170,7 @@ class UpperBodyAnalyzer:
             稳定性评分 (0-1)
         """
         # 抖动越小，稳定性越高
-        stability = max(0.0, 1.0 - torso_jitter * self.config['jitter_multiplier'] / 100.0)
+        stability = max(0.0, 1.0 - torso_jitter * self._jitter_multiplier / 100.0)
         return float(stability)
 
     def _compute_head_score(self, jitter: float, tilt: float) -> float:
@@ -176,7 +188,7 @@ class UpperBodyAnalyzer:
         base_score = 70.0
 
         # 抖动惩罚
-        jitter_penalty = jitter * self.config['jitter_multiplier']
+        jitter_penalty = jitter * self._jitter_multiplier
 
         # 倾斜惩罚（理想角度在0-10度）
         if tilt <= 10:
@@ -204,10 +216,10 @@ class UpperBodyAnalyzer:
         base_score = 70.0
 
         # 抖动惩罚
-        jitter_penalty = jitter * self.config['jitter_multiplier']
+        jitter_penalty = jitter * self._jitter_multiplier
 
         # 稳定性奖励
-        stability_bonus = stability * self.config['stability_bonus']
+        stability_bonus = stability * self._stability_bonus
 
         score = base_score - jitter_penalty + stability_bonus
         return float(score)
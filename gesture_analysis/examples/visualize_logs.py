@@ -98,16 +98,16 @@ def plot_and_save_gesture_features(
         plt.rcParams['axes.unicode_minus'] = False  # 正常显示负号
         use_chinese = False
 
+        # 只查询字体元数据判断字体是否可用，无需创建测试图
+        from matplotlib import font_manager
         for font in chinese_fonts:
             try:
-                plt.rcParams['font.sans-serif'] = [font]
-                fig_test, ax_test = plt.subplots()
-                ax_test.text(0.5, 0.5, '测试')
-                plt.close(fig_test)
-                use_chinese = True
-                break
-            except:
+                font_manager.findfont(font_manager.FontProperties(family=font), fallback_to_default=False)
+            except ValueError:
                 continue
+            plt.rcParams['font.sans-serif'] = [font]
+            use_chinese = True
+            break
 
         if not use_chinese:
             plt.rcParams['font.sans-serif'] = ['DejaVu Sans']
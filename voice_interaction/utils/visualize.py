@@ -106,21 +106,21 @@ def setup_chinese_font():
     """设置中文字体，返回是否使用中文"""
     try:
         import matplotlib.pyplot as plt
+        from matplotlib import font_manager
     except ImportError:
         return False, False
 
     chinese_fonts = ['SimHei', 'Microsoft YaHei', 'DejaVu Sans', 'sans-serif']
     plt.rcParams['axes.unicode_minus'] = False
 
+    # 只查询字体元数据判断字体是否可用，无需创建测试图
     for font in chinese_fonts:
         try:
-            plt.rcParams['font.sans-serif'] = [font]
-            fig, ax = plt.subplots()
-            ax.text(0.5, 0.5, '测试')
-            plt.close(fig)
-            return True, True
-        except:
+            font_manager.findfont(font_manager.FontProperties(family=font), fallback_to_default=False)
+        except ValueError:
             continue
+        plt.rcParams['font.sans-serif'] = [font]
+        return True, True
 
     plt.rcParams['font.sans-serif'] = ['DejaVu Sans']
     return True, False